@@ -0,0 +1,269 @@
+"""
+Agregação de Transações - GastX
+Acumulador de passada única para estatísticas, resumo por categoria,
+totais e dados mensais de um upload, e séries por período (dia/semana/mês)
+"""
+
+from typing import Any, Dict, List, Tuple
+
+import pandas as pd
+
+
+class UploadAccumulator:
+    """
+    Acumula as agregações de um upload à medida que os blocos de
+    transações são categorizados, sem percorrer a lista novamente.
+
+    Cada bloco deve conter as colunas 'date', 'amount', 'category' e
+    'confidence'.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.categorized = 0
+        self.by_confidence: Dict[str, int] = {"high": 0, "medium": 0, "low": 0, "none": 0}
+        self.by_category: Dict[str, int] = {}
+        self.total_spent = 0.0
+        self.total_received = 0.0
+        self._spent_by_category: Dict[str, List[float]] = {}
+        self._monthly: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        """Incorpora um bloco de transações categorizadas"""
+        self._accumulate(chunk, 1)
+
+    def remove(self, chunk: pd.DataFrame) -> None:
+        """
+        Retira um bloco já incorporado (ex.: linhas que serão recategorizadas
+        e incorporadas de novo), descartando categorias que ficam vazias
+        """
+        self._accumulate(chunk, -1)
+        self.by_category = {cat: n for cat, n in self.by_category.items() if n > 0}
+        self._spent_by_category = {
+            cat: entry for cat, entry in self._spent_by_category.items() if entry[1] > 0
+        }
+        for entry in self._monthly.values():
+            # Gastos são positivos e em centavos: menos de meio centavo é resíduo
+            entry["categorias"] = {
+                cat: total for cat, total in entry["categorias"].items() if abs(total) >= 0.005
+            }
+
+    def _accumulate(self, chunk: pd.DataFrame, sign: int) -> None:
+        """Soma (sign=1) ou subtrai (sign=-1) as agregações de um bloco"""
+        if chunk.empty:
+            return
+
+        category = chunk["category"]
+        amount = chunk["amount"]
+        spent_mask = amount > 0
+        received_mask = amount < 0
+
+        self.total += sign * len(chunk)
+        self.categorized += sign * int((category != "Outros").sum())
+
+        for level, count in chunk["confidence"].value_counts(sort=False).items():
+            self.by_confidence[level] = self.by_confidence.get(level, 0) + sign * int(count)
+
+        for cat, count in category.value_counts(sort=False).items():
+            self.by_category[cat] = self.by_category.get(cat, 0) + sign * int(count)
+
+        self.total_spent += sign * float(amount[spent_mask].sum())
+        self.total_received += sign * float(amount[received_mask].sum())
+
+        spent = chunk[spent_mask]
+        grouped = spent.groupby("category", sort=False)["amount"].agg(["sum", "count"])
+        for cat, row in grouped.iterrows():
+            entry = self._spent_by_category.setdefault(cat, [0.0, 0])
+            entry[0] += sign * float(row["sum"])
+            entry[1] += sign * int(row["count"])
+
+        self._add_monthly(chunk, spent_mask, sign)
+
+    def _add_monthly(self, chunk: pd.DataFrame, spent_mask: pd.Series, sign: int = 1) -> None:
+        """Acumula gastos, recebimentos e categorias por mês ("YYYY-MM")"""
+        dates = parse_dates(chunk["date"])
+        valid = dates.notna()
+        if not valid.any():
+            return
+
+        frame = pd.DataFrame({
+            "month": dates[valid].dt.to_period("M"),
+            "amount": chunk["amount"][valid],
+            "category": chunk["category"][valid],
+            "spent": spent_mask[valid]
+        })
+
+        for period, group in frame.groupby("month", sort=False):
+            month = period.strftime("%Y-%m")
+            entry = self._monthly.setdefault(
+                month, {"gastos": 0.0, "recebidos": 0.0, "categorias": {}}
+            )
+            spent = group[group["spent"]]
+            entry["gastos"] += sign * float(spent["amount"].sum())
+            entry["recebidos"] += sign * float(group.loc[~group["spent"], "amount"].abs().sum())
+
+            categories = entry["categorias"]
+            for cat, total in spent.groupby("category", sort=False)["amount"].sum().items():
+                categories[cat] = categories.get(cat, 0.0) + sign * float(total)
+
+    def stats(self) -> Dict[str, Any]:
+        """Estatísticas de categorização: totais, por confiança e por categoria"""
+        stats = {
+            "total": self.total,
+            "categorized": self.categorized,
+            "uncategorized": self.total - self.categorized,
+            "by_confidence": dict(self.by_confidence),
+            "by_category": dict(self.by_category)
+        }
+        if self.total > 0:
+            stats["categorization_rate"] = round(self.categorized / self.total * 100, 1)
+        else:
+            stats["categorization_rate"] = 0
+        return stats
+
+    def category_summary(self) -> List[Dict[str, Any]]:
+        """Resumo de gastos por categoria, ordenado pelo total"""
+        result = [
+            {
+                "category": cat,
+                "total": round(total, 2),
+                "count": count,
+                "percentage": 0
+            }
+            for cat, (total, count) in self._spent_by_category.items()
+        ]
+
+        grand_total = sum(item["total"] for item in result)
+        if grand_total > 0:
+            for item in result:
+                item["percentage"] = round((item["total"] / grand_total) * 100, 1)
+
+        result.sort(key=lambda x: x["total"], reverse=True)
+        return result
+
+    def monthly_data(self) -> List[Dict[str, Any]]:
+        """Gastos, recebimentos e saldo por mês, em ordem cronológica"""
+        result = []
+        for month, data in self._monthly.items():
+            gastos = data["gastos"]
+            recebidos = data["recebidos"]
+            result.append({
+                "month": month,
+                "gastos": round(gastos, 2),
+                "recebidos": round(recebidos, 2),
+                "saldo": round(recebidos - gastos, 2),
+                "categorias": {k: round(v, 2) for k, v in data["categorias"].items()}
+            })
+
+        result.sort(key=lambda x: x["month"])
+        return result
+
+    def totals(self) -> Dict[str, float]:
+        """Total gasto e total recebido"""
+        return {
+            "total_spent": round(self.total_spent, 2),
+            "total_received": round(abs(self.total_received), 2)
+        }
+
+
+# Granularidades suportadas: frequência do pandas e formato do rótulo
+GRANULARITIES: Dict[str, Tuple[str, str]] = {
+    "day": ("D", "%Y-%m-%d"),
+    "week": ("W-SUN", "%Y-%m-%d"),   # Semanas de segunda a domingo
+    "month": ("M", "%Y-%m")
+}
+
+
+def parse_dates(dates: pd.Series) -> pd.Series:
+    """Converte datas ISO (YYYY-MM-DD) ou DD/MM/YYYY para datetime64"""
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+    dates = dates.astype(str)
+    parsed = pd.to_datetime(dates, errors="coerce", format="ISO8601")
+    missing = parsed.isna()
+    if missing.any():
+        parsed[missing] = pd.to_datetime(
+            dates[missing], errors="coerce", format="%d/%m/%Y"
+        )
+    return parsed
+
+
+def _periods(transactions: pd.DataFrame, granularity: str) -> pd.DataFrame:
+    """Anexa a coluna 'period' (início do período) às transações com data válida"""
+    freq, _ = GRANULARITIES[granularity]
+    dates = parse_dates(transactions["date"])
+    valid = dates.notna()
+
+    frame = transactions.loc[valid, ["amount", "category"]].copy()
+    frame["period"] = dates[valid].dt.to_period(freq).dt.start_time
+    return frame
+
+
+def aggregate_by_period(transactions: pd.DataFrame, granularity: str = "month") -> List[Dict[str, Any]]:
+    """
+    Gastos, recebimentos, saldo e quantidade de transações por período.
+    
+    Args:
+        transactions: DataFrame com 'date', 'amount' e 'category'
+        granularity: day, week ou month
+        
+    Returns:
+        Lista ordenada cronologicamente com um item por período com dados
+    """
+    _, label = GRANULARITIES[granularity]
+    frame = _periods(transactions, granularity)
+    amount = frame["amount"]
+    frame["gastos"] = amount.where(amount > 0, 0.0)
+    frame["recebidos"] = (-amount).where(amount <= 0, 0.0)
+
+    grouped = frame.groupby("period", sort=True).agg(
+        gastos=("gastos", "sum"),
+        recebidos=("recebidos", "sum"),
+        count=("amount", "size")
+    )
+
+    return [
+        {
+            "period": period.strftime(label),
+            "start": period.strftime("%Y-%m-%d"),
+            "gastos": round(float(row.gastos), 2),
+            "recebidos": round(float(row.recebidos), 2),
+            "saldo": round(float(row.recebidos - row.gastos), 2),
+            "count": int(row["count"])
+        }
+        for period, row in grouped.iterrows()
+    ]
+
+
+def category_evolution(transactions: pd.DataFrame, granularity: str = "month") -> Dict[str, Any]:
+    """
+    Gastos por categoria em cada período (apenas valores positivos).
+    
+    Args:
+        transactions: DataFrame com 'date', 'amount' e 'category'
+        granularity: day, week ou month
+        
+    Returns:
+        Dicionário com as categorias presentes e a série por período
+    """
+    _, label = GRANULARITIES[granularity]
+    frame = _periods(transactions, granularity)
+    frame = frame[frame["amount"] > 0]
+
+    table = frame.pivot_table(
+        index="period", columns="category", values="amount",
+        aggfunc="sum", fill_value=0.0
+    ).sort_index()
+
+    data = []
+    for period, row in table.iterrows():
+        data.append({
+            "period": period.strftime(label),
+            "start": period.strftime("%Y-%m-%d"),
+            "values": {cat: round(float(v), 2) for cat, v in row.items() if v}
+        })
+
+    return {
+        "categories": sorted(table.columns.tolist()),
+        "data": data
+    }
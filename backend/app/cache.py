@@ -0,0 +1,133 @@
+"""
+Cache LRU limitado - GastX
+Usado para memoizar resultados caros (categorização, uploads)
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+class LRUCache:
+    """Cache LRU com limite de tamanho e contadores de acerto/erro"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = max(0, maxsize)
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Retorna o valor cacheado (marcando-o como recente) ou o padrão"""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Armazena um valor, descartando os menos usados se necessário"""
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove todas as entradas (os contadores são mantidos)"""
+        with self._lock:
+            self._data.clear()
+
+    def evict_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove as entradas cuja chave satisfaz o predicado; retorna quantas"""
+        with self._lock:
+            stale = [key for key in self._data if predicate(key)]
+            for key in stale:
+                del self._data[key]
+            return len(stale)
+
+    def values(self) -> List[Any]:
+        """Cópia dos valores armazenados, do menos ao mais recente (sem afetar a ordem)"""
+        with self._lock:
+            return list(self._data.values())
+
+    def resize(self, maxsize: int) -> None:
+        """Altera o limite de tamanho, descartando o excedente"""
+        with self._lock:
+            self.maxsize = max(0, maxsize)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna tamanho, limite e taxa de acerto do cache"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total * 100, 1) if total else 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+
+class SizedLRUCache(LRUCache):
+    """
+    Cache LRU limitado pela soma dos tamanhos dos valores (ex.: bytes de
+    respostas serializadas) em vez do número de entradas. Valores maiores
+    que o limite não são armazenados.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int] = len):
+        super().__init__(max_bytes)
+        self.bytes = 0
+        self._sizeof = sizeof
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self._sizeof(value)
+        if size > self.maxsize:
+            return
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self.bytes -= self._sizeof(previous)
+            self._data[key] = value
+            self.bytes += size
+            self._trim()
+
+    def _trim(self) -> None:
+        while self.bytes > self.maxsize:
+            _, value = self._data.popitem(last=False)
+            self.bytes -= self._sizeof(value)
+
+    def evict_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        with self._lock:
+            stale = [key for key in self._data if predicate(key)]
+            for key in stale:
+                self.bytes -= self._sizeof(self._data.pop(key))
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def resize(self, maxsize: int) -> None:
+        with self._lock:
+            self.maxsize = max(0, maxsize)
+            self._trim()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "bytes": self.bytes}
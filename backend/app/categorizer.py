@@ -1,12 +1,31 @@
 """
 Motor de Categorização de Transações - GastX
-Versão 0.3.0 - Pipeline aprimorado com regex, níveis de confiança e sugestões
+Versão 0.4.0 - Motor de casamento com pré-filtro por n-gramas
 """
 
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
 from dataclasses import dataclass
 from enum import Enum
+from threading import Lock
+import hashlib
+import json
 import re
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from app.cache import LRUCache
+from app.config import CATEGORIZER_CACHE_SIZE
+from app.metrics import Gauge, categorizer_matches, categorizer_patterns_evaluated, registry
+from app.profiling import pattern_profiler
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
 
 
 class ConfidenceLevel(Enum):
@@ -17,7 +36,7 @@ class ConfidenceLevel(Enum):
     NONE = "none"       # Não categorizado
 
 
-@dataclass
+@dataclass(frozen=True)
 class CategoryMatch:
     """Resultado de uma categorização"""
     category: str
@@ -27,6 +46,7 @@ class CategoryMatch:
 
 # Dicionário de padrões para categorização com regex
 # Cada categoria tem padrões organizados por prioridade (high -> medium -> low)
+# Padrões embutidos; os vigentes (com os adicionados) vêm de get_patterns()
 CATEGORY_PATTERNS: Dict[str, Dict[str, List[str]]] = {
     "Transporte": {
         "high": [
@@ -211,23 +231,431 @@ CATEGORY_PATTERNS: Dict[str, Dict[str, List[str]]] = {
     }
 }
 
-# Cache para padrões compilados
-_compiled_patterns: Dict[str, Dict[str, List[re.Pattern]]] = {}
+PRIORITIES: List[str] = ["high", "medium", "low"]
+
+PRIORITY_CONFIDENCE: Dict[str, ConfidenceLevel] = {
+    "high": ConfidenceLevel.HIGH,
+    "medium": ConfidenceLevel.MEDIUM,
+    "low": ConfidenceLevel.LOW
+}
+
+# Peso de cada prioridade no score de sugestão e sugestões por título
+SUGGESTION_WEIGHTS: Dict[str, float] = {"high": 1.0, "medium": 0.6, "low": 0.3}
+SUGGESTION_LIMIT = 5
+
+# Tamanho dos n-gramas usados no índice de pré-filtragem
+_NGRAM_SIZE = 3
+
+
+# Identidade de um padrão: (categoria, prioridade, regex)
+RuleKey = Tuple[str, str, str]
+
+
+@dataclass
+class CompiledRule:
+    """Padrão compilado com sua posição na ordem de avaliação"""
+    order: int
+    category: str
+    priority: str
+    regex: re.Pattern
+
+    @property
+    def key(self) -> RuleKey:
+        """Identidade do padrão no perfil: (categoria, prioridade, regex)"""
+        return (self.category, self.priority, self.regex.pattern)
+
+
+def _required_literal(pattern: str) -> str:
+    """
+    Extrai o maior trecho literal obrigatório de um padrão regex.
+    Retorna string vazia quando não é possível garantir nenhum literal
+    (alternâncias no nível raiz, classes de caracteres, etc.).
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except (re.error, RecursionError):
+        return ""
+
+    best = ""
+    current = []
+    for op, value in parsed:
+        if op is sre_constants.LITERAL:
+            current.append(chr(value))
+            continue
+        if op is sre_constants.AT:
+            # Âncoras (\b, ^, $) não consomem caracteres
+            continue
+        if op is sre_constants.BRANCH:
+            return ""
+        if len(current) > len(best):
+            best = "".join(current)
+        current = []
+    if len(current) > len(best):
+        best = "".join(current)
+    return best.lower()
+
+
+class PatternMatcher:
+    """
+    Motor de casamento de padrões com pré-filtro por n-gramas.
+
+    Cada padrão é indexado por um n-grama do seu literal obrigatório
+    (ex.: "ube" para r"\buber\b"). Para um título, apenas os padrões
+    cujo n-grama aparece no texto são avaliados, na mesma ordem
+    prioridade -> categoria -> padrão da varredura sequencial.
+    """
+
+    def __init__(
+        self,
+        patterns: Dict[str, Dict[str, List[str]]],
+        previous: Optional["PatternMatcher"] = None
+    ):
+        """
+        Args:
+            patterns: Padrões por categoria e prioridade
+            previous: Motor anterior; padrões já compilados nele são
+                reaproveitados e só os novos passam por re.compile
+        """
+        self.rules: List[CompiledRule] = []
+        # Ordem das categorias do conjunto de padrões usado
+        self.categories: List[str] = list(patterns)
+        self._index: Dict[str, List[int]] = {}
+        self._always: List[int] = []
+        self._gram_sizes: set = set()
+        # Regex compilada e literal obrigatório de cada padrão
+        self._compiled: Dict[str, Tuple[re.Pattern, str]] = {}
+        reuse = previous._compiled if previous is not None else {}
+
+        for priority in PRIORITIES:
+            for category, priorities in patterns.items():
+                for pattern in priorities.get(priority, []):
+                    self._add_rule(category, priority, pattern, reuse)
+
+    def _add_rule(
+        self,
+        category: str,
+        priority: str,
+        pattern: str,
+        reuse: Dict[str, Tuple[re.Pattern, str]]
+    ) -> None:
+        compiled = self._compiled.get(pattern) or reuse.get(pattern)
+        if compiled is None:
+            # Os títulos chegam sem acentos (normalize_title); o padrão também
+            folded = fold_accents(pattern)
+            compiled = (re.compile(folded, re.IGNORECASE), _required_literal(folded))
+        self._compiled[pattern] = compiled
+        regex, literal = compiled
+        order = len(self.rules)
+        self.rules.append(CompiledRule(
+            order=order,
+            category=category,
+            priority=priority,
+            regex=regex
+        ))
+
+        if len(literal) < 2:
+            self._always.append(order)
+            return
+
+        gram = literal[:_NGRAM_SIZE]
+        self._gram_sizes.add(len(gram))
+        self._index.setdefault(gram, []).append(order)
+
+    def _candidates(self, text: str) -> List[int]:
+        """Retorna os índices dos padrões que podem casar, em ordem"""
+        text = text.lower()
+        candidates = set(self._always)
+        index = self._index
+        for size in self._gram_sizes:
+            for i in range(len(text) - size + 1):
+                ids = index.get(text[i:i + size])
+                if ids:
+                    candidates.update(ids)
+        return sorted(candidates)
+
+    def match(self, text: str) -> Optional[CompiledRule]:
+        """Retorna o primeiro padrão (na ordem de prioridade) que casa"""
+        return self.match_counted(text)[0]
+
+    def match_counted(self, text: str) -> Tuple[Optional[CompiledRule], int]:
+        """Como match(), retornando também quantos padrões foram avaliados"""
+        if pattern_profiler.enabled:
+            matched, evaluated = self._scan_profiled(text, first_only=True)
+            return (matched[0] if matched else None), evaluated
+
+        rules = self.rules
+        evaluated = 0
+        for order in self._candidates(text):
+            evaluated += 1
+            rule = rules[order]
+            if rule.regex.search(text):
+                return rule, evaluated
+        return None, evaluated
+
+    def match_all(self, text: str) -> List[CompiledRule]:
+        """Retorna todos os padrões que casam com o texto"""
+        if pattern_profiler.enabled:
+            return self._scan_profiled(text, first_only=False)[0]
+
+        rules = self.rules
+        return [
+            rules[order] for order in self._candidates(text)
+            if rules[order].regex.search(text)
+        ]
+
+
+    def _scan_profiled(self, text: str, first_only: bool) -> Tuple[List[CompiledRule], int]:
+        """Avalia os candidatos medindo cada regex.search (modo de perfil)"""
+        rules = self.rules
+        matched: List[CompiledRule] = []
+        samples = []
+        for order in self._candidates(text):
+            rule = rules[order]
+            start = time.perf_counter()
+            found = rule.regex.search(text) is not None
+            samples.append((rule.key, found, time.perf_counter() - start))
+            if found:
+                matched.append(rule)
+                if first_only:
+                    break
+        pattern_profiler.record(samples)
+        return matched, len(samples)
+
+
+# Cache do motor de casamento compilado
+_matcher: Optional[PatternMatcher] = None
+
+# Padrões vigentes. Cada troca publica um dicionário novo e nunca altera
+# o publicado, então quem guardou a referência lê um conjunto consistente
+_patterns: Dict[str, Dict[str, List[str]]] = CATEGORY_PATTERNS
+
+# Serializa as trocas do conjunto de regras
+_rules_lock = Lock()
+
+# (versão, resumo SHA-256) do conjunto de regras, calculado sob demanda
+_rules_fingerprint: Optional[Tuple[int, str]] = None
+
+# Versão do conjunto de regras, incrementada a cada alteração de padrões
+_rules_version = 0
+
+# Caches de resultados, indexados pelo título normalizado
+_result_cache = LRUCache(CATEGORIZER_CACHE_SIZE)
+_suggestion_cache = LRUCache(CATEGORIZER_CACHE_SIZE)
+
+# Marcas diacríticas (acentos, cedilha, til) separadas pela decomposição NFKD
+_COMBINING_MARKS = re.compile(r"[\u0300-\u036f]")
+
+# Ruído no fim do título: parcelas ("3/10", "parcela 03 de 10") e finais de cartão
+_TRAILING_NOISE = re.compile(
+    r"(?:[\s\-]+(?:(?:parcela|parc\.?)\s*)?\d{1,2}\s*(?:/|de)\s*\d{1,2}"
+    r"|[\s\-]+(?:final\s*|\*+)\d{4})+[\s\-]*$"
+)
+
+
+def _get_matcher() -> PatternMatcher:
+    """Compila e cacheia o motor de casamento de padrões"""
+    global _matcher
+
+    if _matcher is None:
+        _matcher = PatternMatcher(_patterns)
+
+    return _matcher
+
+
+def _invalidate_caches() -> None:
+    """Descarta o motor compilado e os resultados memoizados"""
+    global _matcher
+
+    _matcher = None
+    _result_cache.clear()
+    _suggestion_cache.clear()
+
+
+def get_patterns() -> Mapping[str, Dict[str, List[str]]]:
+    """Padrões vigentes por categoria e prioridade (somente leitura)"""
+    return _patterns
+
+
+def get_rules_snapshot() -> Tuple[int, Dict[str, Dict[str, List[str]]]]:
+    """Retorna (versão, cópia dos padrões) para replicar as regras em outro processo"""
+    patterns = {
+        category: {priority: list(items) for priority, items in priorities.items()}
+        for category, priorities in _patterns.items()
+    }
+    return _rules_version, patterns
+
+
+def get_rules_fingerprint() -> str:
+    """
+    Resumo (SHA-256) dos padrões vigentes, na ordem de avaliação. Ao
+    contrário da versão, é o mesmo entre processos e reinícios para as
+    mesmas regras, inclusive quando os padrões embutidos mudam no código.
+    """
+    global _rules_fingerprint
+
+    with _rules_lock:
+        if _rules_fingerprint is None or _rules_fingerprint[0] != _rules_version:
+            encoded = json.dumps(_patterns, ensure_ascii=False).encode("utf-8")
+            _rules_fingerprint = (_rules_version, hashlib.sha256(encoded).hexdigest())
+        return _rules_fingerprint[1]
+
+
+def load_rules(version: int, patterns: Dict[str, Dict[str, List[str]]]) -> None:
+    """Substitui os padrões em memória por um conjunto de regras versionado"""
+    with _rules_lock:
+        if version != _rules_version:
+            _swap_rules(version, patterns)
+
+
+def _swap_rules(version: int, patterns: Dict[str, Dict[str, List[str]]]) -> None:
+    """
+    Troca o conjunto de regras sem recompilar os padrões que não mudaram.
+
+    O novo motor é montado antes da troca, então as consultas seguintes
+    não pagam a compilação. Quando a alteração só acrescenta padrões, os
+    resultados memoizados continuam válidos exceto para os títulos em que
+    algum padrão novo casa; esses são descartados. Remoções ou mudanças
+    de ordem descartam os caches inteiros.
+    """
+    global _matcher, _patterns, _rules_version
+
+    previous = _matcher
+    matcher = PatternMatcher(patterns, previous)
+
+    # Publica o dicionário recebido (o chamador não o altera depois)
+    _patterns = patterns
+    _matcher = matcher
+    _rules_version = version
+
+    if previous is None:
+        clear_categorization_cache()
+        return
+
+    added = _added_rules([rule.key for rule in previous.rules], matcher)
+    if added is None:
+        clear_categorization_cache()
+        return
+
+    if added:
+        regexes = [rule.regex for rule in added]
+        affected = lambda key: any(regex.search(key) for regex in regexes)
+        _result_cache.evict_where(affected)
+        _suggestion_cache.evict_where(affected)
+
+
+def _added_rules(previous_keys: Sequence[RuleKey], matcher: PatternMatcher) -> Optional[List[CompiledRule]]:
+    """
+    Padrões do motor que não existiam no conjunto anterior.
+    None quando a alteração não é só acréscimo (remoção ou mudança de
+    ordem): aí qualquer resultado anterior pode ter mudado.
+    """
+    known = set(previous_keys)
+    kept = [rule.key for rule in matcher.rules if rule.key in known]
+    if kept != list(previous_keys):
+        return None
+    return [rule for rule in matcher.rules if rule.key not in known]
+
 
+def get_rule_keys() -> Tuple[RuleKey, ...]:
+    """Identidade dos padrões vigentes, na ordem de avaliação"""
+    return tuple(rule.key for rule in _get_matcher().rules)
 
-def _get_compiled_patterns() -> Dict[str, Dict[str, List[re.Pattern]]]:
-    """Compila e cacheia os padrões regex"""
-    global _compiled_patterns
+
+def get_rules_diff(
+    previous_keys: Sequence[RuleKey]
+) -> Tuple[Tuple[RuleKey, ...], Optional[List[CompiledRule]]]:
+    """
+    Compara os padrões vigentes com um conjunto anterior (de get_rule_keys).
     
-    if not _compiled_patterns:
-        for category, priorities in CATEGORY_PATTERNS.items():
-            _compiled_patterns[category] = {}
-            for priority, patterns in priorities.items():
-                _compiled_patterns[category][priority] = [
-                    re.compile(p, re.IGNORECASE) for p in patterns
-                ]
+    Args:
+        previous_keys: Identidade dos padrões usados antes
+        
+    Returns:
+        Tupla (padrões vigentes, padrões acrescentados desde então), com
+        None no lugar dos acrescentados se houve remoção ou reordenação
+    """
+    with _rules_lock:
+        matcher = _get_matcher()
+    keys = tuple(rule.key for rule in matcher.rules)
+    return keys, _added_rules(previous_keys, matcher)
+
+
+def fold_accents(text: str) -> str:
+    """Remove acentos: decomposição NFKD sem as marcas diacríticas"""
+    if text.isascii():
+        return text
+    return _COMBINING_MARKS.sub("", unicodedata.normalize("NFKD", text))
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normaliza um título para uso como chave de cache.
+    Converte para minúsculas, remove acentos, colapsa espaços e remove
+    contadores de parcela e finais de cartão no fim do texto.
+    """
+    text = " ".join(fold_accents(title.lower()).split())
+    return _TRAILING_NOISE.sub("", text).strip()
+
+
+def normalize_titles(titles: Sequence) -> np.ndarray:
+    """
+    Versão vetorizada de normalize_title para uma coluna de títulos
+    (nulos viram ""). Cada etapa roda sobre a coluna inteira, e a
+    decomposição de acentos apenas sobre os títulos não ASCII.
     
-    return _compiled_patterns
+    Args:
+        titles: Series, array ou lista de títulos
+        
+    Returns:
+        Array de objetos com os títulos normalizados, na ordem da entrada
+    """
+    text = pd.Series(titles, dtype=object).fillna("").astype(str).str.lower()
+    accented = ~text.map(str.isascii).to_numpy(dtype=bool)
+    if accented.any():
+        text[accented] = (
+            text[accented].str.normalize("NFKD").str.replace(_COMBINING_MARKS, "", regex=True)
+        )
+    text = text.str.split().str.join(" ")
+    text = text.str.replace(_TRAILING_NOISE, "", regex=True).str.strip()
+    return text.to_numpy(dtype=object)
+
+
+def clear_categorization_cache() -> None:
+    """Descarta os resultados memoizados (as regras compiladas são mantidas)"""
+    _result_cache.clear()
+    _suggestion_cache.clear()
+
+
+def get_cache_stats() -> Dict[str, Dict]:
+    """Retorna os contadores dos caches de categorização"""
+    return {
+        "categorization": _result_cache.stats(),
+        "suggestions": _suggestion_cache.stats()
+    }
+
+
+def get_pattern_profile(sort_by: str = "seconds", limit: int = 50) -> Dict:
+    """Relatório do perfil de padrões para as regras atuais"""
+    keys = [rule.key for rule in _get_matcher().rules]
+    return pattern_profiler.report(keys, sort_by, limit)
+
+
+def _cache_requests() -> Dict[Tuple[str, str], int]:
+    """Acertos e faltas dos caches de categorização, para /metrics"""
+    values = {}
+    for cache, stats in get_cache_stats().items():
+        values[(cache, "hit")] = stats["hits"]
+        values[(cache, "miss")] = stats["misses"]
+    return values
+
+
+registry.register(Gauge(
+    "gastx_categorizer_cache_requests_total",
+    "Consultas aos caches de categorização do processo da API",
+    _cache_requests,
+    ("cache", "result"),
+    kind="counter"
+))
 
 
 def categorize_transaction(title: str) -> str:
@@ -245,12 +673,17 @@ def categorize_transaction(title: str) -> str:
     return result.category
 
 
-def categorize_transaction_detailed(title: str) -> CategoryMatch:
+def categorize_transaction_detailed(
+    title: str,
+    overrides: Optional[Mapping[str, str]] = None
+) -> CategoryMatch:
     """
     Categoriza uma transação com informações detalhadas.
     
     Args:
         title: Descrição/título da transação
+        overrides: Correções do usuário (título normalizado -> categoria),
+            consultadas antes dos padrões
         
     Returns:
         CategoryMatch com categoria, confiança e padrão correspondente
@@ -261,47 +694,53 @@ def categorize_transaction_detailed(title: str) -> CategoryMatch:
             confidence=ConfidenceLevel.NONE
         )
     
-    title_clean = title.strip()
-    patterns = _get_compiled_patterns()
+    key = normalize_title(title)
+    if overrides:
+        category = overrides.get(key)
+        if category is not None:
+            return CategoryMatch(category=category, confidence=ConfidenceLevel.HIGH)
     
-    # Prioridade: high -> medium -> low
-    priority_map = {
-        "high": ConfidenceLevel.HIGH,
-        "medium": ConfidenceLevel.MEDIUM,
-        "low": ConfidenceLevel.LOW
-    }
+    cached = _result_cache.get(key)
+    if cached is not None:
+        return cached
     
-    for priority in ["high", "medium", "low"]:
-        for category, priority_patterns in patterns.items():
-            if priority not in priority_patterns:
-                continue
-            for pattern in priority_patterns[priority]:
-                if pattern.search(title_clean):
-                    return CategoryMatch(
-                        category=category,
-                        confidence=priority_map[priority],
-                        matched_pattern=pattern.pattern
-                    )
+    matcher = _get_matcher()
+    rule, evaluated = matcher.match_counted(key)
+    categorizer_patterns_evaluated.observe(evaluated)
+    categorizer_matches.inc(rule.priority if rule is not None else "none")
+    if rule is not None:
+        result = CategoryMatch(
+            category=rule.category,
+            confidence=PRIORITY_CONFIDENCE[rule.priority],
+            matched_pattern=rule.regex.pattern
+        )
+    else:
+        result = CategoryMatch(
+            category="Outros",
+            confidence=ConfidenceLevel.NONE
+        )
     
-    return CategoryMatch(
-        category="Outros",
-        confidence=ConfidenceLevel.NONE
-    )
+    # Resultado calculado com regras que foram trocadas no meio não é memoizado
+    if matcher is _matcher:
+        _result_cache.put(key, result)
+    return result
 
 
 def get_all_categories() -> List[str]:
     """Retorna lista de todas as categorias disponíveis"""
-    return list(CATEGORY_PATTERNS.keys()) + ["Outros"]
+    return list(_patterns.keys()) + ["Outros"]
 
 
 def get_category_patterns(category: str) -> Dict[str, List[str]]:
     """Retorna os padrões de uma categoria específica"""
-    return CATEGORY_PATTERNS.get(category, {})
+    return _patterns.get(category, {})
 
 
 def add_pattern(category: str, pattern: str, priority: str = "medium") -> bool:
     """
     Adiciona um novo padrão a uma categoria existente.
+    Altera apenas este processo; a API grava pelo rule_store (app.rules),
+    que persiste o padrão e o replica entre os workers.
     
     Args:
         category: Nome da categoria
@@ -311,22 +750,19 @@ def add_pattern(category: str, pattern: str, priority: str = "medium") -> bool:
     Returns:
         True se adicionado com sucesso
     """
-    global _compiled_patterns
-    
-    if category not in CATEGORY_PATTERNS:
+    if category not in _patterns:
         return False
     
-    if priority not in CATEGORY_PATTERNS[category]:
-        CATEGORY_PATTERNS[category][priority] = []
-    
     pattern_lower = pattern.lower()
-    if pattern_lower not in CATEGORY_PATTERNS[category][priority]:
-        CATEGORY_PATTERNS[category][priority].append(pattern_lower)
-        # Limpa cache para recompilar
-        _compiled_patterns = {}
-        return True
-    
-    return False
+    with _rules_lock:
+        version, patterns = get_rules_snapshot()
+        current = patterns[category].setdefault(priority, [])
+        if pattern_lower in current:
+            return False
+        current.append(pattern_lower)
+        # Compila só o padrão novo e descarta só os resultados afetados
+        _swap_rules(version + 1, patterns)
+    return True
 
 
 def suggest_category(title: str) -> List[Tuple[str, float]]:
@@ -343,29 +779,95 @@ def suggest_category(title: str) -> List[Tuple[str, float]]:
     if not title:
         return []
     
-    title_lower = title.lower()
-    suggestions = []
-    patterns = _get_compiled_patterns()
+    key = normalize_title(title)
+    cached = _suggestion_cache.get(key)
+    if cached is not None:
+        return list(cached)
     
-    for category, priority_patterns in patterns.items():
-        score = 0.0
-        matches = 0
-        
-        for priority, compiled in priority_patterns.items():
-            weight = {"high": 1.0, "medium": 0.6, "low": 0.3}[priority]
-            for pattern in compiled:
-                if pattern.search(title_lower):
-                    score += weight
-                    matches += 1
-        
-        if matches > 0:
+    scores: Dict[str, float] = {}
+    
+    matcher = _get_matcher()
+    for rule in matcher.match_all(key):
+        scores[rule.category] = scores.get(rule.category, 0.0) + SUGGESTION_WEIGHTS[rule.priority]
+    
+    suggestions = []
+    for category in matcher.categories:
+        if category in scores:
             # Normaliza score
-            normalized = min(score / 2, 1.0)
+            normalized = min(scores[category] / 2, 1.0)
             suggestions.append((category, normalized))
     
     # Ordena por score decrescente
     suggestions.sort(key=lambda x: x[1], reverse=True)
-    return suggestions[:5]
+    suggestions = suggestions[:SUGGESTION_LIMIT]
+    if matcher is _matcher:
+        _suggestion_cache.put(key, suggestions)
+    return list(suggestions)
+
+
+def suggest_categories(titles: Sequence[str], top_k: int = SUGGESTION_LIMIT) -> List[List[Tuple[str, float]]]:
+    """
+    Sugere categorias para vários títulos em uma passada.
+    
+    Os títulos são normalizados e deduplicados; os que não estão no cache
+    passam pelo motor de casamento uma única vez. Os acertos (título,
+    padrão) formam uma matriz esparsa que, multiplicada pelos pesos de
+    prioridade de cada padrão, vira a matriz título x categoria de scores.
+    Mesmos scores e ordenação de suggest_category.
+    
+    Args:
+        titles: Descrições das transações
+        top_k: Sugestões por título (no máximo SUGGESTION_LIMIT)
+        
+    Returns:
+        Lista de sugestões (categoria, score) para cada título, na ordem da entrada
+    """
+    keys = [normalize_title(title) if isinstance(title, str) and title else "" for title in titles]
+    results: Dict[str, List[Tuple[str, float]]] = {"": []}
+    pending = []
+    for key in dict.fromkeys(keys):
+        if key in results:
+            continue
+        cached = _suggestion_cache.get(key)
+        if cached is not None:
+            results[key] = cached
+        else:
+            pending.append(key)
+    
+    if pending:
+        matcher = _get_matcher()
+        categories = matcher.categories
+        column = {category: i for i, category in enumerate(categories)}
+        rule_columns = np.array([column[rule.category] for rule in matcher.rules], dtype=np.intp)
+        rule_weights = np.array([SUGGESTION_WEIGHTS[rule.priority] for rule in matcher.rules])
+        
+        # Matriz de acertos em coordenadas: (linha do título, índice do padrão)
+        rows: List[int] = []
+        hits: List[int] = []
+        for row, key in enumerate(pending):
+            for rule in matcher.match_all(key):
+                rows.append(row)
+                hits.append(rule.order)
+        
+        scores = np.zeros((len(pending), len(categories)))
+        if hits:
+            hit_rules = np.array(hits, dtype=np.intp)
+            np.add.at(scores, (np.array(rows, dtype=np.intp), rule_columns[hit_rules]), rule_weights[hit_rules])
+        scores = np.minimum(scores / 2, 1.0)
+        
+        # Ordenação estável: empates mantêm a ordem das categorias
+        ranked = np.argsort(-scores, axis=1, kind="stable")[:, :SUGGESTION_LIMIT]
+        top = np.take_along_axis(scores, ranked, axis=1)
+        swapped = matcher is not _matcher
+        for key, columns, values in zip(pending, ranked.tolist(), top.tolist()):
+            suggestions = [
+                (categories[col], value) for col, value in zip(columns, values) if value > 0
+            ]
+            results[key] = suggestions
+            if not swapped:
+                _suggestion_cache.put(key, suggestions)
+    
+    return [list(results[key][:top_k]) for key in keys]
 
 
 def batch_categorize(titles: List[str]) -> List[CategoryMatch]:
@@ -382,51 +884,98 @@ def batch_categorize(titles: List[str]) -> List[CategoryMatch]:
     return [categorize_transaction_detailed(title) for title in titles]
 
 
-def get_categorization_stats(transactions: List[Dict]) -> Dict:
+def categorize_unique_titles(titles: Sequence) -> Tuple[List[str], List[str]]:
     """
-    Retorna estatísticas sobre a categorização de um conjunto de transações.
+    Categoriza uma lista de títulos distintos.
     
     Args:
-        transactions: Lista de transações com 'title' e 'category'
+        titles: Títulos (valores não textuais são tratados como vazios)
         
     Returns:
-        Dicionário com estatísticas
-    """
-    stats = {
-        "total": len(transactions),
-        "categorized": 0,
-        "uncategorized": 0,
-        "by_confidence": {
-            "high": 0,
-            "medium": 0,
-            "low": 0,
-            "none": 0
-        },
-        "by_category": {}
-    }
+        Tupla (categorias, níveis de confiança), na ordem da entrada
+    """
+    matches = [
+        categorize_transaction_detailed(title if isinstance(title, str) else "")
+        for title in titles
+    ]
+    return (
+        [m.category for m in matches],
+        [m.confidence.value for m in matches]
+    )
+
+
+def _categorize_with_overrides(
+    keys: Sequence[str],
+    overrides: Mapping[str, str],
+    categorize_uniques: Callable[[Sequence], Tuple[List[str], List[str]]]
+) -> Tuple[List[str], List[str]]:
+    """Aplica as correções do usuário e categoriza só os títulos restantes"""
+    forced = [overrides.get(key) for key in keys]
+    remaining = [key for key, category in zip(keys, forced) if category is None]
+    categorized = zip(*categorize_uniques(remaining)) if remaining else iter(())
     
-    for t in transactions:
-        title = t.get("title", "")
-        result = categorize_transaction_detailed(title)
-        
-        if result.category != "Outros":
-            stats["categorized"] += 1
+    categories: List[str] = []
+    confidences: List[str] = []
+    for category in forced:
+        if category is None:
+            category, confidence = next(categorized)
         else:
-            stats["uncategorized"] += 1
-        
-        stats["by_confidence"][result.confidence.value] += 1
+            confidence = ConfidenceLevel.HIGH.value
+        categories.append(category)
+        confidences.append(confidence)
+    return categories, confidences
+
+
+def batch_categorize_series(
+    titles,
+    categorize_uniques: Callable[[Sequence], Tuple[List[str], List[str]]] = categorize_unique_titles,
+    overrides: Optional[Mapping[str, str]] = None
+) -> pd.DataFrame:
+    """
+    Categoriza uma coluna inteira de títulos de forma vetorizada.
+    
+    Os títulos são fatorados em valores únicos, que são normalizados
+    (normalize_titles) e fatorados de novo: variações de caixa, acento,
+    parcela e final de cartão viram um único título. O motor de casamento
+    roda apenas sobre esses títulos e o resultado é propagado às linhas
+    pelos códigos.
+    
+    Args:
+        titles: pandas Series ou array NumPy de descrições
+        categorize_uniques: Função que categoriza os títulos distintos
+            (permite distribuir o trabalho entre processos)
+        overrides: Correções do usuário (título normalizado -> categoria);
+            os títulos corrigidos não passam pelos padrões
         
-        cat = result.category
-        if cat not in stats["by_category"]:
-            stats["by_category"][cat] = 0
-        stats["by_category"][cat] += 1
+    Returns:
+        DataFrame com colunas 'category' e 'confidence', alinhado ao índice
+        da entrada
+    """
+    if not isinstance(titles, pd.Series):
+        titles = pd.Series(titles, dtype=object)
     
-    # Calcula taxa de categorização
-    if stats["total"] > 0:
-        stats["categorization_rate"] = round(
-            stats["categorized"] / stats["total"] * 100, 1
+    codes, uniques = pd.factorize(titles)
+    key_codes, keys = pd.factorize(normalize_titles(uniques))
+    # Códigos -1 (nulos) continuam -1
+    codes = np.append(key_codes, -1)[codes]
+    if overrides:
+        unique_categories, unique_confidences = _categorize_with_overrides(
+            list(keys), overrides, categorize_uniques
         )
     else:
-        stats["categorization_rate"] = 0
+        unique_categories, unique_confidences = categorize_uniques(list(keys))
+    
+    # A última posição atende aos códigos -1 (valores nulos)
+    categories = np.array(unique_categories + ["Outros"], dtype=object)
+    confidences = np.array(
+        unique_confidences + [ConfidenceLevel.NONE.value],
+        dtype=object
+    )
     
-    return stats
+    return pd.DataFrame(
+        {
+            "category": categories[codes],
+            "confidence": confidences[codes]
+        },
+        index=titles.index
+    )
@@ -0,0 +1,71 @@
+"""
+Configurações do Backend GastX
+Valores lidos de variáveis de ambiente com padrões razoáveis
+"""
+
+import os
+
+_CPU_COUNT = os.cpu_count() or 1
+
+
+def _env_int(name: str, default: int) -> int:
+    """Lê um inteiro de variável de ambiente, com fallback para o padrão"""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+# Número máximo de títulos mantidos no cache de categorização
+CATEGORIZER_CACHE_SIZE = _env_int("GASTX_CATEGORIZER_CACHE_SIZE", 50_000)
+
+# Linhas por bloco na leitura de CSV (limita o pico de memória por upload)
+CSV_CHUNK_ROWS = _env_int("GASTX_CSV_CHUNK_ROWS", 50_000)
+
+# Número máximo de uploads mantidos no armazenamento em memória
+STORE_MAX_UPLOADS = _env_int("GASTX_STORE_MAX_UPLOADS", 32)
+
+# Processos para categorização em paralelo (0 desativa o pool)
+CPU_WORKERS = _env_int("GASTX_CPU_WORKERS", _CPU_COUNT)
+
+# Títulos distintos por processo a partir dos quais um bloco é distribuído:
+# o pool entra quando o bloco tem ao menos CPU_WORKERS vezes esse número
+PARALLEL_MIN_TITLES_PER_WORKER = _env_int("GASTX_PARALLEL_MIN_TITLES_PER_WORKER", 500)
+
+# Uploads processados simultaneamente e uploads aguardando na fila
+MAX_CONCURRENT_UPLOADS = _env_int("GASTX_MAX_CONCURRENT_UPLOADS", _CPU_COUNT)
+MAX_QUEUED_UPLOADS = _env_int("GASTX_MAX_QUEUED_UPLOADS", 2 * _CPU_COUNT)
+
+# Número máximo de jobs de upload mantidos (com seus resultados)
+MAX_UPLOAD_JOBS = _env_int("GASTX_MAX_UPLOAD_JOBS", 100)
+
+# Limites do upload em lote: arquivos por requisição e tamanho de cada CSV
+# extraído de um .zip
+MAX_BATCH_FILES = _env_int("GASTX_MAX_BATCH_FILES", 48)
+MAX_ARCHIVE_MEMBER_BYTES = _env_int("GASTX_MAX_ARCHIVE_MEMBER_BYTES", 200 * 1024 * 1024)
+
+# Inclui o cabeçalho Server-Timing (duração de cada etapa) nas respostas de upload
+SERVER_TIMING = _env_int("GASTX_SERVER_TIMING", 0) > 0
+
+# Mede avaliações, acertos e tempo de cada padrão de categorização desde o início
+PATTERN_PROFILING = _env_int("GASTX_PATTERN_PROFILING", 0) > 0
+
+# Diretório dos arquivos de estado compartilhados entre os workers da API
+DATA_DIR = os.getenv("GASTX_DATA_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"
+)
+
+# Arquivo JSON com os padrões adicionados pela API
+RULES_PATH = os.getenv("GASTX_RULES_PATH") or os.path.join(DATA_DIR, "rules.json")
+
+# Arquivo JSON com as categorias definidas pelo usuário por estabelecimento
+OVERRIDES_PATH = os.getenv("GASTX_OVERRIDES_PATH") or os.path.join(DATA_DIR, "overrides.json")
+
+# Cache de resultados de upload pelo hash do arquivo: respostas serializadas
+# em memória e resultados da ingestão em disco (0 desativa cada camada)
+UPLOAD_CACHE_BYTES = _env_int("GASTX_UPLOAD_CACHE_BYTES", 256 * 1024 * 1024)
+UPLOAD_CACHE_DISK_BYTES = _env_int("GASTX_UPLOAD_CACHE_DISK_BYTES", 1024 * 1024 * 1024)
+UPLOAD_CACHE_DIR = os.getenv("GASTX_UPLOAD_CACHE_DIR") or os.path.join(DATA_DIR, "upload-cache")
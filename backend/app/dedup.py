@@ -0,0 +1,75 @@
+"""
+Deduplicação de Transações - GastX
+Identidade de transações entre extratos com períodos sobrepostos
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.categorizer import normalize_titles
+
+FINGERPRINT_COLUMNS = ["date", "title_key", "cents", "occurrence"]
+
+
+def fingerprint_frame(transactions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula a identidade de cada transação: data, título normalizado,
+    valor em centavos e índice de ocorrência.
+
+    O índice de ocorrência diferencia transações legítimas repetidas no
+    mesmo extrato (ex.: dois cafés iguais no mesmo dia): a primeira recebe
+    0, a segunda 1, e assim por diante.
+    """
+    codes, uniques = pd.factorize(transactions["title"].astype(str))
+    normalized = np.append(normalize_titles(uniques), "")
+
+    keys = pd.DataFrame({
+        "date": transactions["date"].to_numpy(),
+        "title_key": normalized[codes],
+        "cents": np.round(transactions["amount"].to_numpy(dtype=float) * 100).astype(np.int64)
+    }, index=transactions.index)
+    keys["occurrence"] = keys.groupby(
+        ["date", "title_key", "cents"], sort=False, dropna=False
+    ).cumcount()
+    return keys
+
+
+def fingerprint_hashes(transactions: pd.DataFrame) -> np.ndarray:
+    """
+    Identidade de cada transação (ver fingerprint_frame) reduzida a um hash
+    de 64 bits, para consultas em conjuntos de transações já conhecidas.
+
+    Returns:
+        Array uint64 com um hash por linha, na ordem das transações
+    """
+    keys = fingerprint_frame(transactions)
+    return pd.util.hash_pandas_object(keys[FINGERPRINT_COLUMNS], index=False).to_numpy()
+
+
+def merge_without_overlap(frames: List[pd.DataFrame]) -> Tuple[pd.DataFrame, List[int]]:
+    """
+    Junta as transações de vários extratos descartando as que se repetem
+    entre arquivos (períodos sobrepostos).
+
+    Uma transação que aparece N vezes em um arquivo e M vezes em outro
+    resulta em max(N, M) transações no conjunto final.
+
+    Args:
+        frames: Transações de cada arquivo, na ordem de prioridade
+
+    Returns:
+        Tupla (transações mescladas, duplicatas removidas por arquivo)
+    """
+    if not frames:
+        return pd.DataFrame(), []
+
+    keys = pd.concat([fingerprint_frame(f) for f in frames], ignore_index=True)
+    source = np.repeat(np.arange(len(frames)), [len(f) for f in frames])
+    merged = pd.concat(frames, ignore_index=True)
+
+    duplicated = keys.duplicated(subset=FINGERPRINT_COLUMNS, keep="first").to_numpy()
+    removed = np.bincount(source[duplicated], minlength=len(frames))
+
+    return merged[~duplicated].reset_index(drop=True), [int(n) for n in removed]
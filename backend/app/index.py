@@ -0,0 +1,112 @@
+"""
+Índice Colunar de Transações - GastX
+Arrays NumPy ordenados para faixas de data/valor e bitmaps por categoria
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def bitmap_from_rows(rows: np.ndarray, size: int) -> np.ndarray:
+    """Converte índices de linha em um bitmap compactado (1 bit por linha)"""
+    mask = np.zeros(size, dtype=bool)
+    mask[rows] = True
+    return np.packbits(mask)
+
+
+def bitmap_from_mask(mask: np.ndarray) -> np.ndarray:
+    """Converte uma máscara booleana em bitmap compactado"""
+    return np.packbits(np.asarray(mask, dtype=bool))
+
+
+def parse_day(value: str) -> np.datetime64:
+    """Data "YYYY-MM-DD" (ou DD/MM/YYYY) como datetime64 do início do dia"""
+    parsed = pd.to_datetime(value, format="ISO8601", errors="coerce")
+    if pd.isna(parsed):
+        parsed = pd.to_datetime(value, format="%d/%m/%Y")
+    return np.datetime64(parsed.normalize(), "ns")
+
+
+class TransactionIndex:
+    """
+    Índice de um conjunto de transações.
+
+    - Datas e valores absolutos ficam em arrays ordenados (com a permutação
+      correspondente), então faixas são resolvidas por busca binária.
+    - Cada categoria tem um bitmap de linhas; seleção de categorias e
+      combinação de filtros são operações bit a bit.
+    - As contagens por categoria (facetas) saem de um único bincount sobre
+      as linhas que passam nos demais filtros.
+    """
+
+    def __init__(self, transactions: pd.DataFrame):
+        self.size = len(transactions)
+
+        dates = transactions["date"].to_numpy(dtype="datetime64[ns]")
+        self.date_order = np.argsort(dates, kind="stable")
+        self.sorted_dates = dates[self.date_order]
+        # NaT fica no fim da ordenação e fora de qualquer faixa
+        self.valid_dates = int(np.count_nonzero(~np.isnat(dates)))
+
+        amounts = transactions["amount"].to_numpy(dtype=float)
+        self.amount_order = np.argsort(amounts, kind="stable")
+        absolute = np.abs(amounts)
+        self.abs_order = np.argsort(absolute, kind="stable")
+        self.sorted_abs = absolute[self.abs_order]
+
+        codes, categories = pd.factorize(transactions["category"])
+        self.category_codes = codes
+        self.categories: List[str] = list(categories)
+        self.category_bitmaps: Dict[str, np.ndarray] = {
+            category: bitmap_from_mask(codes == code)
+            for code, category in enumerate(self.categories)
+        }
+
+        self.expense_bitmap = bitmap_from_mask(amounts > 0)
+        self.income_bitmap = bitmap_from_mask(amounts < 0)
+        self.all_bitmap = bitmap_from_mask(np.ones(self.size, dtype=bool))
+
+    def date_range(self, start: Optional[str], end: Optional[str]) -> np.ndarray:
+        """Bitmap das linhas com data entre start e end (dias inteiros, inclusive)"""
+        lo = 0
+        if start:
+            lo = np.searchsorted(self.sorted_dates, parse_day(start), side="left")
+        hi = self.valid_dates
+        if end:
+            hi = np.searchsorted(self.sorted_dates[:hi], parse_day(end) + np.timedelta64(1, "D"), side="left")
+        return bitmap_from_rows(self.date_order[lo:hi], self.size)
+
+    def amount_range(self, minimum: Optional[float], maximum: Optional[float]) -> np.ndarray:
+        """Bitmap das linhas com valor absoluto entre minimum e maximum"""
+        lo = 0 if minimum is None else np.searchsorted(self.sorted_abs, minimum, side="left")
+        hi = self.size if maximum is None else np.searchsorted(self.sorted_abs, maximum, side="right")
+        return bitmap_from_rows(self.abs_order[lo:hi], self.size)
+
+    def category_union(self, categories: List[str]) -> np.ndarray:
+        """Bitmap das linhas pertencentes a qualquer uma das categorias"""
+        result = np.zeros_like(self.all_bitmap)
+        for category in categories:
+            bitmap = self.category_bitmaps.get(category)
+            if bitmap is not None:
+                result |= bitmap
+        return result
+
+    def rows(self, bitmap: np.ndarray) -> np.ndarray:
+        """Índices das linhas marcadas no bitmap, em ordem do arquivo"""
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.size))
+
+    def sorted_rows(self, bitmap: np.ndarray, order: np.ndarray) -> np.ndarray:
+        """Linhas marcadas no bitmap, seguindo uma permutação de ordenação"""
+        mask = np.unpackbits(bitmap, count=self.size).astype(bool)
+        return order[mask[order]]
+
+    def facet_counts(self, bitmap: np.ndarray) -> Dict[str, int]:
+        """Contagem de linhas por categoria dentro do bitmap"""
+        codes = self.category_codes[self.rows(bitmap)]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.categories))
+        return {
+            category: int(count)
+            for category, count in zip(self.categories, counts)
+        }
@@ -0,0 +1,420 @@
+"""
+Ingestão de Extratos CSV - GastX
+Leitura em blocos com memória limitada, detecção de banco e normalização
+"""
+
+import codecs
+import os
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Iterator, List, Mapping, Optional, Tuple
+
+import pandas as pd
+
+from app.aggregation import UploadAccumulator, parse_dates
+from app.categorizer import batch_categorize_series, categorize_unique_titles
+from app.config import CSV_CHUNK_ROWS, MAX_ARCHIVE_MEMBER_BYTES
+from app.metrics import StageTimings
+from app.parsers import COLUMN_ALIASES, parse_amounts, parse_date_column, sniff_layout
+
+# Bytes lidos do início (e do fim) do arquivo para detectar o encoding
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+# Bytes 0x80-0x9F que o cp1252 não define
+_CP1252_UNDEFINED = frozenset({0x81, 0x8D, 0x8F, 0x90, 0x9D})
+
+# Bytes 0x80-0x9F definidos no cp1252
+_CP1252_PRINTABLE = frozenset(range(0x80, 0xA0)) - _CP1252_UNDEFINED
+
+# Tratador de erros de decodificação registrado em codecs (ver _decode_fallback)
+DECODE_FALLBACK = 'gastx-cp1252'
+
+# CSVs extraídos de um .zip ficam em memória até este tamanho, depois em disco
+ARCHIVE_SPOOL_SIZE = 8 * 1024 * 1024
+
+REQUIRED_COLUMNS = ['date', 'title', 'amount']
+
+
+class IngestionError(ValueError):
+    """Erro de formato do arquivo enviado (colunas ausentes, CSV inválido)"""
+
+
+@dataclass
+class IngestedUpload:
+    """Resultado da ingestão de um arquivo"""
+    bank: str
+    accumulator: UploadAccumulator
+    transactions: Optional[pd.DataFrame] = None
+
+
+def empty_transactions() -> pd.DataFrame:
+    """DataFrame de transações vazio, com os tipos das colunas"""
+    return pd.DataFrame({
+        "date": pd.Series(dtype="datetime64[ns]"),
+        "title": pd.Series(dtype=object),
+        "amount": pd.Series(dtype=float),
+        "category": pd.Series(dtype=object),
+        "confidence": pd.Series(dtype=object)
+    })
+
+
+def detect_bank(columns: List[str]) -> str:
+    """Detecta o banco com base nas colunas do CSV"""
+    columns_lower = [c.lower().strip() for c in columns]
+    columns_set = set(columns_lower)
+    
+    # Padrão Nubank: date, title, amount
+    if {'date', 'title', 'amount'}.issubset(columns_set):
+        return "Nubank"
+    
+    # Padrão Inter: Data, Descrição, Valor
+    if 'data' in columns_set and ('descrição' in columns_set or 'descricao' in columns_set):
+        return "Inter"
+    
+    # Padrão Bradesco
+    if 'data' in columns_set and 'histórico' in columns_set:
+        return "Bradesco"
+    
+    # Padrão Itaú
+    if 'data' in columns_set and 'lançamento' in columns_set:
+        return "Itaú"
+    
+    # Padrão C6 Bank
+    if 'data' in columns_set and 'movimentação' in columns_set:
+        return "C6 Bank"
+    
+    # Padrão genérico
+    return "Desconhecido"
+
+
+def normalize_columns(df: pd.DataFrame, bank: str) -> pd.DataFrame:
+    """Normaliza as colunas do DataFrame para um padrão único"""
+    df.columns = df.columns.str.lower().str.strip()
+    df = df.rename(columns=COLUMN_ALIASES)
+    
+    # Limpa valores de amount se necessário ("R$ 1.234,56" -> 1234.56)
+    if 'amount' in df.columns and df['amount'].dtype == object:
+        df['amount'] = parse_amounts(df['amount'])
+    
+    return df
+
+
+@contextmanager
+def _parser_errors() -> Iterator[None]:
+    """Converte falhas do parser (arquivo vazio, conteúdo que não é CSV) em IngestionError"""
+    try:
+        yield
+    except pd.errors.EmptyDataError:
+        raise IngestionError("Arquivo vazio ou sem cabeçalho")
+    except pd.errors.ParserError as e:
+        raise IngestionError(f"Arquivo não é um CSV válido: {e}")
+    except UnicodeDecodeError as e:
+        raise IngestionError(f"Arquivo com bytes inválidos para {e.encoding}")
+
+
+def _decode_fallback(error: UnicodeDecodeError) -> Tuple[str, int]:
+    """
+    Decodifica como cp1252 os bytes inválidos no encoding detectado (latin-1
+    nos que o cp1252 não define). As amostras não cobrem o meio do arquivo:
+    um extrato latin-1 com acentos só ali mantém os títulos em vez de "�".
+    """
+    invalid = error.object[error.start:error.end]
+    text = ''.join(
+        chr(byte) if byte in _CP1252_UNDEFINED else bytes([byte]).decode('cp1252')
+        for byte in invalid
+    )
+    return text, error.end
+
+
+codecs.register_error(DECODE_FALLBACK, _decode_fallback)
+
+
+def _encoding_errors(encoding: str) -> str:
+    """Tratamento de bytes inválidos: UTF-16 é estrito, os demais caem no cp1252"""
+    return 'strict' if encoding == 'utf-16' else DECODE_FALLBACK
+
+
+def _is_utf8(sample: bytes, partial_start: bool = False) -> bool:
+    """
+    Verifica se a amostra é UTF-8 válido. Tolera um caractere cortado no
+    fim e, se partial_start, bytes de continuação no início.
+    """
+    if partial_start:
+        # Descarta até 3 bytes de continuação (0b10xxxxxx) de um caractere cortado
+        skip = 0
+        while skip < 3 and skip < len(sample) and 0x80 <= sample[skip] <= 0xBF:
+            skip += 1
+        sample = sample[skip:]
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def detect_encoding(head: bytes, tail: bytes = b"") -> str:
+    """
+    Detecta o encoding a partir de amostras limitadas do arquivo.
+    
+    Ordem de decisão:
+        1. BOM (UTF-8 ou UTF-16)
+        2. UTF-8, se as amostras forem UTF-8 válido
+        3. cp1252, se houver bytes 0x80-0x9F (caracteres imprimíveis no
+           cp1252, como "€" e aspas curvas, mas controles no latin-1)
+        4. latin-1
+    
+    Args:
+        head: Bytes do início do arquivo
+        tail: Bytes do fim do arquivo (opcional)
+        
+    Returns:
+        Nome do encoding para decodificar o arquivo inteiro
+    """
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+
+    if _is_utf8(head) and _is_utf8(tail, partial_start=True):
+        return 'utf-8'
+
+    sample = head + tail
+    if any(byte in _CP1252_PRINTABLE for byte in sample if 0x80 <= byte <= 0x9F):
+        return 'cp1252'
+    return 'latin-1'
+
+
+def iter_csv_chunks(
+    fileobj: BinaryIO,
+    chunksize: int = CSV_CHUNK_ROWS,
+    timings: Optional[StageTimings] = None
+) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Lê um CSV binário em blocos de linhas já normalizados.
+    
+    Args:
+        fileobj: Arquivo binário posicionado no início
+        chunksize: Número de linhas por bloco
+        timings: Acumula as durações das etapas decode, read_csv e normalize
+        
+    Yields:
+        Tuplas (banco detectado, bloco normalizado)
+    """
+    timings = timings or StageTimings()
+
+    with timings.stage("decode"):
+        head = fileobj.read(ENCODING_SAMPLE_SIZE)
+        tail = b""
+        if len(head) == ENCODING_SAMPLE_SIZE:
+            fileobj.seek(0, os.SEEK_END)
+            size = fileobj.tell()
+            fileobj.seek(max(ENCODING_SAMPLE_SIZE, size - ENCODING_SAMPLE_SIZE))
+            tail = fileobj.read(ENCODING_SAMPLE_SIZE)
+        fileobj.seek(0)
+        encoding = detect_encoding(head, tail)
+        errors = _encoding_errors(encoding)
+
+        with _parser_errors():
+            layout = sniff_layout(
+                head.decode(encoding, errors=errors),
+                detect_bank,
+                complete=len(head) < ENCODING_SAMPLE_SIZE
+            )
+    if layout is None:
+        # Cabeçalho não reconhecido: leitura genérica com inferência de tipos
+        yield from _iter_inferred_chunks(fileobj, encoding, chunksize, timings)
+        return
+
+    # Bytes vão direto para o parser; bytes inválidos fora das amostras
+    # são lidos como cp1252/latin-1 (nunca viram caractere de substituição)
+    with _parser_errors():
+        reader = pd.read_csv(
+            fileobj,
+            encoding=encoding,
+            encoding_errors=errors,
+            chunksize=chunksize,
+            **layout.read_options()
+        )
+    with reader:
+        for chunk in _timed(reader, timings):
+            with timings.stage("normalize"):
+                chunk = chunk.rename(columns=layout.columns)
+                chunk['date'] = parse_date_column(chunk['date'], layout.date_format)
+                if not pd.api.types.is_numeric_dtype(chunk['amount']):
+                    # Algum valor fora do formato do perfil neste bloco
+                    chunk['amount'] = parse_amounts(chunk['amount'])
+            yield layout.profile.bank, chunk
+
+
+def _timed(reader: Iterator[pd.DataFrame], timings: StageTimings) -> Iterator[pd.DataFrame]:
+    """Itera os blocos do parser contabilizando o tempo de leitura"""
+    while True:
+        with timings.stage("read_csv"), _parser_errors():
+            chunk = next(reader, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def _iter_inferred_chunks(
+    fileobj: BinaryIO,
+    encoding: str,
+    chunksize: int,
+    timings: StageTimings
+) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """Leitura sem perfil: inferência de tipos e normalização por bloco"""
+    with _parser_errors():
+        reader = pd.read_csv(
+            fileobj,
+            encoding=encoding,
+            encoding_errors=_encoding_errors(encoding),
+            chunksize=chunksize
+        )
+    bank = None
+    with reader:
+        for chunk in _timed(reader, timings):
+            with timings.stage("normalize"):
+                if bank is None:
+                    # Detecta o banco pelo formato das colunas
+                    bank = detect_bank(chunk.columns.tolist())
+                chunk = normalize_columns(chunk, bank)
+
+                missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+                if missing:
+                    raise IngestionError(
+                        f"Colunas obrigatórias não encontradas: {', '.join(missing)}"
+                    )
+                chunk['date'] = parse_dates(chunk['date']).dt.normalize()
+            yield bank, chunk
+
+
+def categorize_chunk(
+    chunk: pd.DataFrame,
+    categorize_uniques: Callable = categorize_unique_titles,
+    overrides: Optional[Mapping[str, str]] = None
+) -> pd.DataFrame:
+    """Categoriza um bloco normalizado e retorna as colunas de transação"""
+    columns = transaction_columns(chunk)
+    categorized = batch_categorize_series(columns['title'], categorize_uniques, overrides)
+    columns['category'] = categorized['category']
+    columns['confidence'] = categorized['confidence']
+    return columns
+
+
+def transaction_columns(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Colunas tipadas (data, título, valor) de um bloco normalizado, sem categoria"""
+    return pd.DataFrame({
+        "date": parse_dates(chunk['date']),
+        "title": chunk['title'].fillna('').astype(str),
+        # Valor vazio vira 0, como em parse_amounts no caminho textual
+        "amount": chunk['amount'].astype(float).fillna(0)
+    })
+
+
+def ingest_csv(
+    fileobj: BinaryIO,
+    keep_transactions: bool = True,
+    chunksize: int = CSV_CHUNK_ROWS,
+    categorize_uniques: Callable = categorize_unique_titles,
+    on_chunk: Optional[Callable[[UploadAccumulator], None]] = None,
+    timings: Optional[StageTimings] = None,
+    overrides: Optional[Mapping[str, str]] = None
+) -> IngestedUpload:
+    """
+    Lê, categoriza e agrega um CSV bloco a bloco.
+    
+    Args:
+        fileobj: Arquivo binário posicionado no início
+        keep_transactions: Se False, as transações não são mantidas em
+            memória (apenas as agregações), mantendo o uso de memória
+            constante independente do tamanho do arquivo
+        chunksize: Número de linhas por bloco
+        categorize_uniques: Função que categoriza os títulos distintos de
+            cada bloco (ex.: CPUExecutor.categorize_uniques)
+        on_chunk: Chamada após cada bloco com o acumulador parcial
+            (usada para reportar progresso)
+        timings: Acumula as durações de cada etapa
+        overrides: Correções de categoria do usuário por estabelecimento
+        
+    Returns:
+        IngestedUpload com banco, agregações e (opcionalmente) transações
+    """
+    accumulator = UploadAccumulator()
+    frames: List[pd.DataFrame] = []
+    bank = "Desconhecido"
+
+    timings = timings or StageTimings()
+
+    for bank, chunk in iter_csv_chunks(fileobj, chunksize, timings):
+        with timings.stage("categorize"):
+            columns = categorize_chunk(chunk, categorize_uniques, overrides)
+        with timings.stage("aggregate"):
+            accumulator.add(columns)
+        if keep_transactions:
+            frames.append(columns)
+        if on_chunk is not None:
+            on_chunk(accumulator)
+
+    transactions = None
+    if keep_transactions:
+        if frames:
+            transactions = pd.concat(frames, ignore_index=True)
+        else:
+            transactions = empty_transactions()
+
+    return IngestedUpload(bank=bank, accumulator=accumulator, transactions=transactions)
+
+
+def _extract_member(zf: zipfile.ZipFile, info: zipfile.ZipInfo, limit: int) -> BinaryIO:
+    """Copia um membro do .zip em blocos, abortando se passar do limite"""
+    if info.file_size > limit:
+        raise IngestionError(f"{info.filename}: arquivo muito grande")
+    
+    target = tempfile.SpooledTemporaryFile(max_size=ARCHIVE_SPOOL_SIZE)
+    written = 0
+    with zf.open(info) as source:
+        # O tamanho declarado no .zip não é confiável: conta o que é descompactado
+        while block := source.read(1024 * 1024):
+            written += len(block)
+            if written > limit:
+                target.close()
+                raise IngestionError(f"{info.filename}: arquivo muito grande")
+            target.write(block)
+    target.seek(0)
+    return target
+
+
+def extract_csv_files(
+    archive: BinaryIO,
+    max_member_bytes: int = MAX_ARCHIVE_MEMBER_BYTES
+) -> List[Tuple[str, BinaryIO]]:
+    """
+    Extrai os CSVs de um arquivo .zip para arquivos temporários.
+    
+    Args:
+        archive: Arquivo .zip binário
+        max_member_bytes: Tamanho máximo (descompactado) de cada CSV
+        
+    Returns:
+        Lista de pares (nome do membro, arquivo posicionado no início)
+    """
+    try:
+        with zipfile.ZipFile(archive) as zf:
+            members = [
+                info for info in zf.infolist()
+                if not info.is_dir() and info.filename.lower().endswith('.csv')
+                and not os.path.basename(info.filename).startswith('.')
+            ]
+            files = []
+            try:
+                for info in members:
+                    files.append((info.filename, _extract_member(zf, info, max_member_bytes)))
+            except Exception:
+                for _, target in files:
+                    target.close()
+                raise
+            return files
+    except zipfile.BadZipFile:
+        raise IngestionError("Arquivo .zip inválido")
@@ -0,0 +1,179 @@
+"""
+Jobs de Upload - GastX
+Processamento de arquivos grandes em segundo plano com progresso consultável
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Mapping, Optional, Set
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from app.aggregation import UploadAccumulator
+from app.cache import LRUCache
+from app.config import MAX_UPLOAD_JOBS
+from app.ingestion import IngestionError
+from app.metrics import UPLOAD_FAILURE_STATUS, StageTimings, record_upload, uploads_total
+from app.pipeline import process_upload
+from app.upload_cache import upload_key
+from app.workers import QueueFullError, upload_limiter
+
+# Tamanho dos blocos copiados do upload para o arquivo temporário
+COPY_BLOCK_SIZE = 1024 * 1024
+
+
+@dataclass
+class UploadJob:
+    """Estado de um upload processado em segundo plano"""
+    job_id: str
+    filename: str
+    path: str
+    bytes_total: int
+    include_transactions: bool = True
+    store: bool = True
+    format: str = "json"
+    overrides: Optional[Mapping[str, str]] = None
+    status: str = "queued"          # queued, processing, done, failed
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    rows_processed: int = 0
+    bytes_processed: int = 0
+    partial: Dict[str, Any] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    error_status: Optional[int] = None
+
+    def record_progress(self, accumulator: UploadAccumulator, bytes_processed: int) -> None:
+        """Registra o avanço após um bloco (chamado na thread de processamento)"""
+        self.rows_processed = accumulator.total
+        self.bytes_processed = min(bytes_processed, self.bytes_total)
+        # Snapshot imutável: leituras concorrentes nunca veem dicionários em alteração
+        self.partial = {
+            "stats": accumulator.stats(),
+            "category_summary": accumulator.category_summary(),
+            **accumulator.totals()
+        }
+
+    def progress(self) -> Dict[str, Any]:
+        """Estado atual do job para consulta pelo cliente"""
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return {
+            "job_id": self.job_id,
+            "filename": self.filename,
+            "status": self.status,
+            "rows_processed": self.rows_processed,
+            "bytes_processed": self.bytes_processed,
+            "bytes_total": self.bytes_total,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows_processed / elapsed, 1) if elapsed > 0 else 0,
+            "partial": self.partial,
+            "upload_id": self.result.get("upload_id") if self.result else None,
+            "error": self.error
+        }
+
+
+class UploadJobManager:
+    """Cria, executa e guarda jobs de upload (os mais antigos são descartados)"""
+
+    def __init__(self, max_jobs: int = MAX_UPLOAD_JOBS):
+        self._jobs = LRUCache(max_jobs)
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(
+        self,
+        file: UploadFile,
+        include_transactions: bool = True,
+        store: bool = True,
+        format: str = "json",
+        overrides: Optional[Mapping[str, str]] = None
+    ) -> UploadJob:
+        """Copia o upload para um arquivo temporário e agenda o processamento"""
+        if upload_limiter.is_full():
+            raise QueueFullError("Servidor ocupado processando outros arquivos")
+
+        handle, path = tempfile.mkstemp(suffix=".csv", prefix="gastx-")
+        size = 0
+        with os.fdopen(handle, "wb") as target:
+            while True:
+                block = await file.read(COPY_BLOCK_SIZE)
+                if not block:
+                    break
+                target.write(block)
+                size += len(block)
+
+        job = UploadJob(
+            job_id=uuid.uuid4().hex,
+            filename=file.filename,
+            path=path,
+            bytes_total=size,
+            include_transactions=include_transactions,
+            store=store,
+            format=format,
+            overrides=overrides
+        )
+        self._jobs.put(job.job_id, job)
+
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str) -> Optional[UploadJob]:
+        """Retorna um job pelo ID, se ainda existir"""
+        return self._jobs.get(job_id)
+
+    async def _run(self, job: UploadJob) -> None:
+        try:
+            async with upload_limiter.slot():
+                job.status = "processing"
+                job.started_at = time.time()
+                job.result = await run_in_threadpool(self._process, job)
+                job.status = "done"
+        except QueueFullError as e:
+            self._fail(job, str(e), 429)
+        except IngestionError as e:
+            self._fail(job, str(e), 400)
+        except Exception as e:
+            self._fail(job, f"Erro ao processar arquivo: {str(e)}", 500)
+        finally:
+            job.finished_at = time.time()
+            try:
+                os.remove(job.path)
+            except OSError:
+                pass
+
+    def _process(self, job: UploadJob) -> Dict[str, Any]:
+        timings = StageTimings()
+        with open(job.path, "rb") as fileobj:
+            with timings.stage("hash"):
+                key = upload_key(fileobj, job.overrides)
+            result = process_upload(
+                fileobj,
+                include_transactions=job.include_transactions,
+                store=job.store,
+                format=job.format,
+                on_chunk=lambda accumulator: job.record_progress(accumulator, fileobj.tell()),
+                timings=timings,
+                overrides=job.overrides,
+                cache_key=key
+            )
+        record_upload(timings, result["total_transactions"], job.bytes_total)
+        return result
+
+    @staticmethod
+    def _fail(job: UploadJob, message: str, status_code: int) -> None:
+        job.status = "failed"
+        job.error = message
+        job.error_status = status_code
+        uploads_total.inc(UPLOAD_FAILURE_STATUS.get(status_code, "error"))
+
+
+# Instância compartilhada pela API
+upload_jobs = UploadJobManager()
@@ -5,21 +5,57 @@ Versão 0.5.0 - Filtros e Buscas Avançadas
 
 from fastapi import FastAPI, UploadFile, File, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+import asyncio
+import re
+import numpy as np
 import pandas as pd
-from io import StringIO
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
-from app.models import TransactionResponse, UploadResponse, CategorySummary
+from app.models import (
+    TransactionResponse,
+    TransactionPageResponse,
+    UploadResponse,
+    AppendUploadResponse,
+    BatchUploadResponse,
+    CategorySummary,
+    MerchantOverride
+)
+from app.ingestion import IngestionError, extract_csv_files
+from app.aggregation import GRANULARITIES
+from app.index import parse_day
+from app.pipeline import UPLOAD_FORMATS, append_upload, ingest_file, merge_uploads, process_upload
+from app.serialization import CompactJSONResponse
+from app.workers import QueueFullError, cpu_executor, upload_limiter
+from app.upload_cache import CachedResponse, upload_cache, upload_key
+from app.jobs import upload_jobs
+from app.store import (
+    SORT_FIELDS,
+    TRANSACTION_TYPES,
+    TransactionFilter,
+    transaction_store
+)
+from app.config import MAX_BATCH_FILES, SERVER_TIMING
+from app.metrics import UPLOAD_FAILURE_STATUS, StageTimings, record_upload, registry, uploads_total
 from app.categorizer import (
+    SUGGESTION_LIMIT,
     categorize_transaction, 
     categorize_transaction_detailed,
     get_all_categories,
-    get_categorization_stats,
     suggest_category,
-    add_pattern
+    suggest_categories,
+    clear_categorization_cache,
+    get_cache_stats,
+    get_pattern_profile,
+    normalize_titles
 )
+from app.profiling import PROFILE_SORT_FIELDS, pattern_profiler
+from app.rules import rule_store
+from app.overrides import DEFAULT_USER, override_store
+from app.persistence import RefreshMiddleware
+from app.recategorize import recategorize_uploads
 
 app = FastAPI(
     title="GastX API",
@@ -36,6 +72,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Aplica padrões e correções gravados por outros workers antes de cada requisição
+app.add_middleware(RefreshMiddleware, stores=[rule_store, override_store])
+
+USER_QUERY = Query(DEFAULT_USER, description="Usuário dono das correções de categoria")
+
+
+@app.on_event("shutdown")
+def shutdown_workers():
+    """Encerra o pool de processos de categorização"""
+    cpu_executor.shutdown()
+
 
 @app.get("/")
 async def root():
@@ -64,10 +111,13 @@ async def list_categories():
 
 
 @app.post("/categories/suggest")
-async def suggest_transaction_category(title: str = Query(..., description="Descrição da transação")):
+async def suggest_transaction_category(
+    title: str = Query(..., description="Descrição da transação"),
+    user: str = USER_QUERY
+):
     """Sugere categorias para uma transação"""
     suggestions = suggest_category(title)
-    current = categorize_transaction_detailed(title)
+    current = categorize_transaction_detailed(title, override_store.for_user(user))
     
     return {
         "title": title,
@@ -90,248 +140,657 @@ async def add_category_pattern(
     if priority not in ["high", "medium", "low"]:
         raise HTTPException(status_code=400, detail="Prioridade deve ser: high, medium, low")
     
-    success = add_pattern(category, pattern, priority)
+    try:
+        success = await run_in_threadpool(rule_store.add_pattern, category, pattern, priority)
+    except re.error as e:
+        raise HTTPException(status_code=400, detail=f"Padrão inválido: {e}")
     if success:
-        return {"success": True, "message": f"Padrão '{pattern}' adicionado à categoria '{category}'"}
+        return {
+            "success": True,
+            "message": f"Padrão '{pattern}' adicionado à categoria '{category}'",
+            "rules_version": rule_store.version
+        }
+    else:
+        raise HTTPException(status_code=400, detail=f"Categoria '{category}' não encontrada")
+
+
+@app.post("/categories/recategorize")
+async def recategorize_stored_uploads(
+    upload_id: Optional[str] = Query(None, description="Upload a recategorizar (padrão: todos os armazenados)"),
+    user: str = USER_QUERY
+):
+    """
+    Aplica as regras atuais às transações já armazenadas (ex.: após
+    /categories/add-pattern), sem reenviar os extratos.
+    
+    Só os padrões acrescentados desde a categorização de cada upload são
+    avaliados, e apenas nas linhas que eles podem alterar. Retorna, por
+    upload, quantas linhas mudaram de categoria e para onde.
+    """
+    if upload_id is not None:
+        uploads = [_get_stored_upload(upload_id)]
     else:
+        uploads = transaction_store.uploads()
+    
+    try:
+        async with upload_limiter.slot():
+            return await run_in_threadpool(
+                recategorize_uploads, uploads, override_store.for_user(user)
+            )
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+
+@app.get("/categories/suggestions")
+async def bulk_suggestions(
+    upload_id: str = Query(..., description="ID retornado pelo upload"),
+    top_k: int = Query(3, ge=1, le=SUGGESTION_LIMIT, description="Sugestões por título"),
+    limit: int = Query(500, ge=1, le=10_000, description="Títulos retornados (os mais frequentes)")
+):
+    """
+    Sugestões para todos os títulos sem categoria ("Outros") de um upload
+    armazenado, calculadas em uma única chamada. Os títulos vêm ordenados
+    pelo número de transações; "merchant" é a chave aceita por
+    /categories/overrides e "title" um exemplo do extrato.
+    """
+    upload = _get_stored_upload(upload_id)
+    return await run_in_threadpool(_uncategorized_suggestions, upload, top_k, limit)
+
+
+def _uncategorized_suggestions(upload, top_k: int, limit: int) -> Dict[str, Any]:
+    """
+    Agrupa os títulos em "Outros" pelo título normalizado (parcelas e
+    finais de cartão juntos) e calcula as sugestões dos mais frequentes
+    """
+    # A recategorização altera a coluna de categoria no lugar
+    with upload.lock:
+        df = upload.transactions
+        uncategorized = df.loc[df["category"] == "Outros", ["title", "amount"]]
+    codes, uniques = pd.factorize(uncategorized["title"])
+    keys = np.append(normalize_titles(uniques), "")
+    grouped = (
+        uncategorized.assign(key=keys[codes], amount=uncategorized["amount"].abs())
+        .groupby("key", sort=False)
+        .agg(title=("title", "first"), size=("amount", "size"), sum=("amount", "sum"))
+        .sort_values("size", ascending=False, kind="stable")
+    )
+    selected = grouped.head(limit)
+    suggestions = suggest_categories(selected["title"].tolist(), top_k)
+    
+    return {
+        "upload_id": upload.upload_id,
+        "total_titles": len(grouped),
+        "total_transactions": len(uncategorized),
+        "items": [
+            {
+                "merchant": key,
+                "title": title,
+                "count": int(count),
+                "total": round(float(total), 2),
+                "suggestions": [
+                    {"category": category, "score": round(score, 2)}
+                    for category, score in items
+                ]
+            }
+            for (key, title, count, total), items in zip(
+                selected.itertuples(name=None), suggestions
+            )
+        ]
+    }
+
+
+def _check_category(category: str) -> None:
+    if category not in get_all_categories():
         raise HTTPException(status_code=400, detail=f"Categoria '{category}' não encontrada")
 
 
+@app.get("/categories/overrides")
+async def list_overrides(user: str = USER_QUERY):
+    """Lista as correções de categoria do usuário por estabelecimento"""
+    table = override_store.for_user(user)
+    return {
+        "user": user,
+        "overrides": [
+            {"merchant": merchant, "category": category}
+            for merchant, category in sorted(table.items())
+        ],
+        "total": len(table)
+    }
+
+
+@app.put("/categories/overrides")
+async def set_override(
+    merchant: str = Query(..., description="Estabelecimento (título da transação)"),
+    category: str = Query(..., description="Categoria a aplicar"),
+    user: str = USER_QUERY
+):
+    """
+    Define a categoria de um estabelecimento para o usuário. A correção
+    vale para os próximos uploads e tem precedência sobre os padrões.
+    """
+    _check_category(category)
+    try:
+        key = await run_in_threadpool(override_store.set, user, merchant, category)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"user": user, "merchant": key, "category": category}
+
+
+@app.delete("/categories/overrides")
+async def delete_override(
+    merchant: str = Query(..., description="Estabelecimento (título da transação)"),
+    user: str = USER_QUERY
+):
+    """Remove a correção de um estabelecimento"""
+    try:
+        removed = await run_in_threadpool(override_store.delete, user, merchant)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"Nenhuma correção para '{merchant}'")
+    return {"user": user, "removed": True}
+
+
+@app.post("/categories/overrides/import")
+async def import_overrides(
+    overrides: List[MerchantOverride],
+    user: str = USER_QUERY,
+    replace: bool = Query(False, description="Substitui todas as correções do usuário")
+):
+    """Importa várias correções de uma vez"""
+    for item in overrides:
+        _check_category(item.category)
+    items = [(item.merchant, item.category) for item in overrides]
+    try:
+        changed = await run_in_threadpool(override_store.import_overrides, user, items, replace)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"user": user, "changed": changed, "total": len(override_store.for_user(user))}
+
+
+@app.get("/categories/profile")
+async def pattern_profile_report(
+    sort_by: str = Query("seconds", description="Ordenação: seconds, evaluations, matches, avg_us"),
+    limit: int = Query(50, ge=1, le=1000, description="Padrões na lista principal")
+):
+    """
+    Perfil das regras de categorização: avaliações, acertos e tempo de
+    busca por padrão, além dos padrões que nunca casaram
+    """
+    if sort_by not in PROFILE_SORT_FIELDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Ordenação deve ser: {', '.join(PROFILE_SORT_FIELDS)}"
+        )
+    return get_pattern_profile(sort_by, limit)
+
+
+@app.post("/categories/profile")
+async def configure_pattern_profile(
+    enabled: bool = Query(..., description="Liga ou desliga o modo de perfil"),
+    reset: Optional[bool] = Query(
+        None, description="Zera o perfil acumulado (padrão: zera ao ligar, mantém ao desligar)"
+    ),
+    clear_cache: bool = Query(
+        False, description="Limpa o cache de categorização para que todos os títulos passem pelos padrões"
+    )
+):
+    """
+    Liga ou desliga a medição por padrão (tem custo; use para diagnóstico).
+    
+    Enquanto o perfil está ligado, uploads não leem o cache de uploads
+    (memória e disco): arquivos já enviados são categorizados de novo.
+    """
+    if reset or (reset is None and enabled):
+        pattern_profiler.reset()
+    if clear_cache:
+        clear_categorization_cache()
+    pattern_profiler.set_enabled(enabled)
+    return {"enabled": pattern_profiler.enabled, "titles_profiled": pattern_profiler.titles}
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Métricas no formato de exposição do Prometheus"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/categories/cache")
+async def categorization_cache_stats():
+    """Retorna estatísticas dos caches de categorização"""
+    return get_cache_stats()
+
+
+@app.get("/uploads/cache")
+async def upload_cache_stats():
+    """Estatísticas do cache de uploads (memória e disco)"""
+    return await run_in_threadpool(upload_cache.stats)
+
+
+@app.delete("/uploads/cache")
+async def clear_upload_cache():
+    """Descarta as respostas e os resultados de ingestão em cache"""
+    await run_in_threadpool(upload_cache.clear)
+    return {"success": True}
+
+
 @app.post("/upload/csv", response_model=UploadResponse)
-async def upload_csv(file: UploadFile = File(...)):
+async def upload_csv(
+    file: UploadFile = File(...),
+    include_transactions: bool = Query(
+        True, description="Se False, retorna apenas as agregações (memória constante)"
+    ),
+    store: bool = Query(
+        True, description="Mantém as transações no servidor para consulta em /transactions"
+    ),
+    format: str = Query(
+        "json", description="Formato das transações: json (lista de objetos) ou columnar"
+    ),
+    user: str = USER_QUERY
+):
     """
     Faz upload de um arquivo CSV de extrato bancário.
     Suporta formatos: Nubank, Inter, Bradesco, Itaú, C6, e genéricos
+    
+    O arquivo é lido em blocos: cada bloco é normalizado, categorizado e
+    agregado antes do próximo ser lido.
+    
+    Com format=columnar, as transações vêm como arrays paralelos, com
+    categoria e confiança codificadas por dicionário.
     """
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="Apenas arquivos CSV são aceitos")
+    if format not in UPLOAD_FORMATS:
+        raise HTTPException(status_code=400, detail="Formato deve ser: json, columnar")
     
     try:
-        contents = await file.read()
-        # Tenta decodificar com diferentes encodings
-        decoded = try_decode(contents)
-        
-        df = pd.read_csv(StringIO(decoded))
-        
-        # Detecta o banco pelo formato das colunas
-        bank = detect_bank(df.columns.tolist())
-        
-        # Normaliza as colunas
-        df = normalize_columns(df, bank)
-        
-        # Valida colunas necessárias
-        required_cols = ['date', 'title', 'amount']
-        missing = [c for c in required_cols if c not in df.columns]
-        if missing:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Colunas obrigatórias não encontradas: {', '.join(missing)}"
+        await file.seek(0)
+        async with upload_limiter.slot():
+            # Parsing e categorização rodam fora do event loop
+            return await run_in_threadpool(
+                _process_upload, file.file, include_transactions, store, format,
+                override_store.for_user(user)
             )
-        
-        # Categoriza as transações com detalhes
-        transactions = []
-        for _, row in df.iterrows():
-            result = categorize_transaction_detailed(row['title'])
-            transaction = {
-                "date": str(row['date']),
-                "title": row['title'],
-                "amount": float(row['amount']),
-                "category": result.category,
-                "confidence": result.confidence.value
-            }
-            transactions.append(transaction)
-        
-        # Calcula resumo por categoria
-        category_summary = calculate_category_summary(transactions)
-        
-        # Calcula estatísticas de categorização
-        stats = get_categorization_stats(transactions)
-        
-        # Calcula total
-        total_spent = sum(t['amount'] for t in transactions if t['amount'] > 0)
-        total_received = abs(sum(t['amount'] for t in transactions if t['amount'] < 0))
-        
-        return UploadResponse(
-            success=True,
-            bank_detected=bank,
-            total_transactions=len(transactions),
-            total_spent=round(total_spent, 2),
-            total_received=round(total_received, 2),
-            transactions=transactions,
-            category_summary=category_summary,
-            categorization_rate=stats.get("categorization_rate", 0)
-        )
-        
+    except QueueFullError as e:
+        uploads_total.inc(UPLOAD_FAILURE_STATUS[429])
+        raise HTTPException(status_code=429, detail=str(e))
+    except IngestionError as e:
+        uploads_total.inc(UPLOAD_FAILURE_STATUS[400])
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
+        uploads_total.inc(UPLOAD_FAILURE_STATUS[500])
         raise HTTPException(status_code=500, detail=f"Erro ao processar arquivo: {str(e)}")
 
 
-def detect_bank(columns: List[str]) -> str:
-    """Detecta o banco com base nas colunas do CSV"""
-    columns_lower = [c.lower().strip() for c in columns]
-    columns_set = set(columns_lower)
-    
-    # Padrão Nubank: date, title, amount
-    if {'date', 'title', 'amount'}.issubset(columns_set):
-        return "Nubank"
-    
-    # Padrão Inter: Data, Descrição, Valor
-    if 'data' in columns_set and ('descrição' in columns_set or 'descricao' in columns_set):
-        return "Inter"
-    
-    # Padrão Bradesco
-    if 'data' in columns_set and 'histórico' in columns_set:
-        return "Bradesco"
+def _process_upload(fileobj, include_transactions: bool, store: bool, format: str, overrides=None):
+    """
+    Etapa síncrona (CPU) do upload: ingestão, armazenamento e resposta.
+    A resposta é serializada aqui para que a etapa entre na cronometragem.
     
-    # Padrão Itaú
-    if 'data' in columns_set and 'lançamento' in columns_set:
-        return "Itaú"
+    Reenvios do mesmo arquivo (com as mesmas regras, correções e opções)
+    recebem a resposta já serializada do cache. Com store=true a resposta
+    não é reaproveitada: cada envio registra um upload próprio (o resultado
+    da ingestão ainda pode vir do cache em disco), para que append e
+    recategorização de um cliente não alterem os dados de outro.
+    """
+    timings = StageTimings()
+    fileobj.seek(0, 2)
+    size = fileobj.tell()
+    fileobj.seek(0)
     
-    # Padrão C6 Bank
-    if 'data' in columns_set and 'movimentação' in columns_set:
-        return "C6 Bank"
+    with timings.stage("hash"):
+        key = upload_key(fileobj, overrides)
+    response_key = None if store else (key, include_transactions, format)
+    cached = upload_cache.get_response(response_key) if response_key else None
+    if cached is not None:
+        response = Response(content=cached.body, media_type="application/json")
+        response.headers["X-Upload-Cache"] = "hit"
+        record_upload(timings, cached.rows, size, status="cached")
+    else:
+        payload = process_upload(
+            fileobj, include_transactions, store, format,
+            timings=timings, overrides=overrides, cache_key=key
+        )
+        with timings.stage("response"):
+            if format == "columnar":
+                response = CompactJSONResponse(payload)
+            else:
+                response = CompactJSONResponse(UploadResponse(**payload).model_dump())
+        if response_key:
+            upload_cache.put_response(response_key, CachedResponse(
+                body=response.body,
+                rows=payload["total_transactions"]
+            ))
+        response.headers["X-Upload-Cache"] = "miss"
+        record_upload(timings, payload["total_transactions"], size)
     
-    # Padrão genérico
-    return "Desconhecido"
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = timings.server_timing()
+    return response
 
 
-def try_decode(contents: bytes) -> str:
-    """Tenta decodificar o conteúdo com diferentes encodings"""
-    encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+@app.post("/upload/append", response_model=AppendUploadResponse)
+async def upload_append(
+    upload_id: str = Query(..., description="Upload armazenado que recebe as transações"),
+    file: UploadFile = File(...),
+    include_transactions: bool = Query(True, description="Inclui as transações novas na resposta"),
+    format: str = Query("json", description="Formato das transações: json ou columnar"),
+    user: str = USER_QUERY
+):
+    """
+    Acrescenta um extrato a um upload armazenado, processando apenas as
+    transações que ele ainda não tem.
     
-    for encoding in encodings:
-        try:
-            return contents.decode(encoding)
-        except UnicodeDecodeError:
-            continue
+    Transações já conhecidas (mesma data, título normalizado, valor e
+    ocorrência) são ignoradas; as novas são categorizadas e somadas às
+    agregações do upload. A resposta traz as agregações do conjunto
+    inteiro e, em transactions, só as transações novas.
+    """
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(status_code=400, detail="Apenas arquivos CSV são aceitos")
+    if format not in UPLOAD_FORMATS:
+        raise HTTPException(status_code=400, detail="Formato deve ser: json, columnar")
+    upload = _get_stored_upload(upload_id)
     
-    # Fallback: força utf-8 ignorando erros
-    return contents.decode('utf-8', errors='ignore')
+    try:
+        await file.seek(0)
+        async with upload_limiter.slot():
+            return await run_in_threadpool(
+                _append_upload, file.file, upload, include_transactions, format,
+                override_store.for_user(user)
+            )
+    except QueueFullError as e:
+        uploads_total.inc(UPLOAD_FAILURE_STATUS[429])
+        raise HTTPException(status_code=429, detail=str(e))
+    except IngestionError as e:
+        uploads_total.inc(UPLOAD_FAILURE_STATUS[400])
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        uploads_total.inc(UPLOAD_FAILURE_STATUS[500])
+        raise HTTPException(status_code=500, detail=f"Erro ao processar arquivo: {str(e)}")
 
 
-def normalize_columns(df: pd.DataFrame, bank: str) -> pd.DataFrame:
-    """Normaliza as colunas do DataFrame para um padrão único"""
-    df.columns = df.columns.str.lower().str.strip()
-    
-    # Mapeamento expandido para múltiplos bancos
-    column_mapping = {
-        # Datas
-        'data': 'date',
-        'data da transação': 'date',
-        'data transação': 'date',
-        'data lançamento': 'date',
-        # Descrições
-        'descrição': 'title',
-        'descriçao': 'title',
-        'descricao': 'title',
-        'histórico': 'title',
-        'historico': 'title',
-        'lançamento': 'title',
-        'lancamento': 'title',
-        'movimentação': 'title',
-        'movimentacao': 'title',
-        'detalhes': 'title',
-        # Valores
-        'valor': 'amount',
-        'value': 'amount',
-        'valor (r$)': 'amount',
-        'quantia': 'amount'
-    }
+def _append_upload(fileobj, upload, include_transactions: bool, format: str, overrides=None):
+    """Etapa síncrona (CPU) do append: deduplicação, categorização e resposta"""
+    timings = StageTimings()
+    fileobj.seek(0, 2)
+    size = fileobj.tell()
+    fileobj.seek(0)
     
-    df = df.rename(columns=column_mapping)
+    payload = append_upload(
+        fileobj, upload, include_transactions, format,
+        timings=timings, overrides=overrides
+    )
+    with timings.stage("response"):
+        if format == "columnar":
+            response = CompactJSONResponse(payload)
+        else:
+            response = CompactJSONResponse(AppendUploadResponse(**payload).model_dump())
+    record_upload(timings, payload["new_transactions"], size)
     
-    # Limpa valores de amount se necessário
-    if 'amount' in df.columns:
-        # Remove caracteres não numéricos (exceto - e .)
-        if df['amount'].dtype == object:
-            df['amount'] = df['amount'].astype(str).str.replace(r'[R$\s]', '', regex=True)
-            df['amount'] = df['amount'].str.replace(',', '.')
-            df['amount'] = pd.to_numeric(df['amount'], errors='coerce').fillna(0)
-    
-    return df
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = timings.server_timing()
+    return response
 
 
-def calculate_category_summary(transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Calcula o resumo de gastos por categoria"""
-    summary = {}
+@app.post("/upload/batch", response_model=BatchUploadResponse)
+async def upload_batch(
+    files: List[UploadFile] = File(...),
+    include_transactions: bool = Query(True, description="Inclui as transações na resposta"),
+    store: bool = Query(
+        True, description="Mantém o conjunto mesclado no servidor para consulta em /transactions"
+    ),
+    format: str = Query("json", description="Formato das transações: json ou columnar"),
+    user: str = USER_QUERY
+):
+    """
+    Faz upload de vários extratos CSV (ou arquivos .zip com CSVs) de uma vez.
     
-    for t in transactions:
-        if t['amount'] > 0:  # Apenas gastos
-            category = t['category']
-            if category not in summary:
-                summary[category] = {"total": 0, "count": 0}
-            summary[category]['total'] += t['amount']
-            summary[category]['count'] += 1
+    Cada arquivo é lido em paralelo, com detecção de banco e normalização
+    próprias. O resultado é um único conjunto de transações, sem as
+    repetidas entre extratos com períodos sobrepostos (mesma data, título
+    e valor).
+    """
+    if format not in UPLOAD_FORMATS:
+        raise HTTPException(status_code=400, detail="Formato deve ser: json, columnar")
+    for file in files:
+        if not file.filename.lower().endswith(('.csv', '.zip')):
+            raise HTTPException(
+                status_code=400, detail=f"{file.filename}: apenas arquivos CSV ou ZIP são aceitos"
+            )
     
-    result = [
-        {
-            "category": cat,
-            "total": round(data['total'], 2),
-            "count": data['count'],
-            "percentage": 0  # Será calculado abaixo
-        }
-        for cat, data in summary.items()
-    ]
+    named_files = []
+    try:
+        async with upload_limiter.slot():
+            named_files = await run_in_threadpool(_collect_batch_files, files)
+            
+            # Um arquivo por thread; a categorização usa o pool de processos
+            overrides = override_store.for_user(user)
+            ingested = await asyncio.gather(*[
+                run_in_threadpool(_ingest_named, name, fileobj, overrides)
+                for name, fileobj in named_files
+            ])
+            return await run_in_threadpool(
+                _merge_batch, ingested, include_transactions, store, format
+            )
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except IngestionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao processar arquivos: {str(e)}")
+    finally:
+        for file in files:
+            await file.close()
+        for _, fileobj in named_files:
+            fileobj.close()
+
+
+def _collect_batch_files(files: List[UploadFile]):
+    """Lista os CSVs do lote, extraindo o conteúdo dos arquivos .zip"""
+    named_files = []
+    try:
+        for file in files:
+            file.file.seek(0)
+            if file.filename.lower().endswith('.zip'):
+                extracted = extract_csv_files(file.file)
+                if not extracted:
+                    raise IngestionError(f"{file.filename}: nenhum CSV encontrado no arquivo")
+                named_files.extend(extracted)
+            else:
+                named_files.append((file.filename, file.file))
+        
+        if len(named_files) > MAX_BATCH_FILES:
+            raise IngestionError(f"Máximo de {MAX_BATCH_FILES} arquivos por lote")
+    except Exception:
+        for _, fileobj in named_files:
+            fileobj.close()
+        raise
+    return named_files
+
+
+def _ingest_named(name: str, fileobj, overrides=None):
+    """Ingere um arquivo do lote, identificando-o nas mensagens de erro"""
+    try:
+        return name, ingest_file(fileobj, overrides)
+    except IngestionError as e:
+        raise IngestionError(f"{name}: {e}")
+
+
+def _merge_batch(ingested, include_transactions: bool, store: bool, format: str):
+    """Etapa síncrona (CPU) da mesclagem do lote e montagem da resposta"""
+    payload = merge_uploads(ingested, include_transactions, store, format)
+    if format == "columnar":
+        return CompactJSONResponse(payload)
+    return BatchUploadResponse(**payload)
+
+
+@app.post("/uploads", status_code=202)
+async def create_upload_job(
+    file: UploadFile = File(...),
+    include_transactions: bool = Query(True, description="Inclui as transações no resultado"),
+    store: bool = Query(True, description="Mantém as transações no servidor"),
+    format: str = Query("json", description="Formato das transações: json ou columnar"),
+    user: str = USER_QUERY
+):
+    """
+    Inicia o processamento de um CSV em segundo plano.
+    Retorna imediatamente o ID do job para consulta de progresso.
+    """
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(status_code=400, detail="Apenas arquivos CSV são aceitos")
+    if format not in UPLOAD_FORMATS:
+        raise HTTPException(status_code=400, detail="Formato deve ser: json, columnar")
     
-    # Calcula percentuais
-    grand_total = sum(item['total'] for item in result)
-    if grand_total > 0:
-        for item in result:
-            item['percentage'] = round((item['total'] / grand_total) * 100, 1)
+    try:
+        job = await upload_jobs.submit(
+            file, include_transactions, store, format, override_store.for_user(user)
+        )
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     
-    # Ordena por valor total decrescente
-    result.sort(key=lambda x: x['total'], reverse=True)
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "status_url": f"/uploads/{job.job_id}",
+        "result_url": f"/uploads/{job.job_id}/result"
+    }
+
+
+def _get_upload_job(job_id: str):
+    """Busca um job de upload ou responde 404"""
+    job = upload_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' não encontrado")
+    return job
+
+
+@app.get("/uploads/{job_id}")
+async def get_upload_job(job_id: str):
+    """Progresso de um job: linhas processadas, vazão e agregados parciais"""
+    return _get_upload_job(job_id).progress()
+
+
+@app.get("/uploads/{job_id}/result", response_model=UploadResponse)
+async def get_upload_job_result(job_id: str):
+    """Resultado de um job concluído (mesmo formato de /upload/csv)"""
+    job = _get_upload_job(job_id)
+    if job.status == "failed":
+        raise HTTPException(status_code=job.error_status or 500, detail=job.error)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail="Processamento ainda em andamento")
     
-    return result
+    if job.format == "columnar":
+        return CompactJSONResponse(job.result)
+    return job.result
 
 
-def calculate_monthly_data(transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Agrupa transações por mês para visualização temporal"""
-    monthly: Dict[str, Dict[str, Any]] = {}
+@app.get("/transactions", response_model=TransactionPageResponse)
+async def list_transactions(
+    upload_id: str = Query(..., description="ID retornado pelo upload"),
+    start_date: Optional[str] = Query(None, description="Data inicial (inclusive)"),
+    end_date: Optional[str] = Query(None, description="Data final (inclusive)"),
+    categories: List[str] = Query([], description="Categorias a incluir"),
+    min_amount: Optional[float] = Query(None, description="Valor absoluto mínimo"),
+    max_amount: Optional[float] = Query(None, description="Valor absoluto máximo"),
+    search: Optional[str] = Query(None, description="Texto contido na descrição"),
+    type: str = Query("all", description="Tipo: all, expenses, income"),
+    sort_by: Optional[str] = Query(None, description="Ordenação: date, title, amount, category"),
+    order: str = Query("asc", description="Direção: asc, desc"),
+    page: int = Query(1, ge=1, description="Página (começando em 1)"),
+    limit: int = Query(20, ge=1, le=500, description="Transações por página")
+):
+    """Consulta paginada e filtrada das transações de um upload armazenado"""
+    if type not in TRANSACTION_TYPES:
+        raise HTTPException(status_code=400, detail="Tipo deve ser: all, expenses, income")
+    if sort_by is not None and sort_by not in SORT_FIELDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Ordenação deve ser: {', '.join(SORT_FIELDS)}"
+        )
     
-    for t in transactions:
-        try:
-            # Extrai ano-mês da data
-            date_str = str(t['date'])
-            if len(date_str) >= 7:
-                month_key = date_str[:7]  # "YYYY-MM"
-            else:
-                continue
-            
-            if month_key not in monthly:
-                monthly[month_key] = {"gastos": 0.0, "recebidos": 0.0, "categorias": {}}
-                
-            amount = float(t['amount'])
-            category = t.get('category', 'Outros')
-            
-            if amount > 0:
-                monthly[month_key]["gastos"] += amount
-                if category not in monthly[month_key]["categorias"]:
-                    monthly[month_key]["categorias"][category] = 0.0
-                monthly[month_key]["categorias"][category] += amount
-            else:
-                monthly[month_key]["recebidos"] += abs(amount)
-                
-        except (ValueError, KeyError):
-            continue
+    for value in (start_date, end_date):
+        if value:
+            try:
+                parse_day(value)
+            except ValueError:
+                raise HTTPException(
+                    status_code=400, detail=f"Data inválida: {value} (use YYYY-MM-DD)"
+                )
     
-    result = []
-    for month, data in monthly.items():
-        gastos = float(data["gastos"])
-        recebidos = float(data["recebidos"])
-        result.append({
-            "month": month,
-            "gastos": round(gastos, 2),
-            "recebidos": round(recebidos, 2),
-            "saldo": round(recebidos - gastos, 2),
-            "categorias": {k: round(float(v), 2) for k, v in data["categorias"].items()}
-        })
+    upload = _get_stored_upload(upload_id)
     
-    # Ordena por mês
-    result.sort(key=lambda x: x["month"])
-    return result
+    filters = TransactionFilter(
+        start_date=start_date,
+        end_date=end_date,
+        categories=categories,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        search=search,
+        transaction_type=type
+    )
+    # Filtragem, ordenação e serialização fora do event loop
+    return await run_in_threadpool(
+        upload.query,
+        filters,
+        page=page,
+        limit=limit,
+        sort_by=sort_by,
+        descending=order == "desc"
+    )
+
+
+def _get_stored_upload(upload_id: str):
+    """Busca um upload armazenado ou responde 404"""
+    upload = transaction_store.get(upload_id)
+    if upload is None:
+        raise HTTPException(status_code=404, detail=f"Upload '{upload_id}' não encontrado")
+    return upload
+
+
+def _validate_granularity(granularity: str) -> None:
+    """Valida a granularidade das agregações temporais"""
+    if granularity not in GRANULARITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Granularidade deve ser: {', '.join(GRANULARITIES)}"
+        )
+
+
+@app.get("/aggregates/monthly")
+async def monthly_aggregates(
+    upload_id: str = Query(..., description="ID retornado pelo upload"),
+    granularity: str = Query("month", description="Granularidade: day, week, month")
+):
+    """Gastos, recebimentos e saldo por período de um upload armazenado"""
+    _validate_granularity(granularity)
+    upload = _get_stored_upload(upload_id)
+    return {
+        "upload_id": upload_id,
+        "granularity": granularity,
+        "data": await run_in_threadpool(upload.period_totals, granularity)
+    }
+
+
+@app.get("/aggregates/categories")
+async def category_aggregates(
+    upload_id: str = Query(..., description="ID retornado pelo upload"),
+    granularity: str = Query("month", description="Granularidade: day, week, month")
+):
+    """Evolução dos gastos por categoria ao longo dos períodos"""
+    _validate_granularity(granularity)
+    upload = _get_stored_upload(upload_id)
+    return {
+        "upload_id": upload_id,
+        "granularity": granularity,
+        **await run_in_threadpool(upload.category_evolution, granularity)
+    }
 
 
 if __name__ == "__main__":
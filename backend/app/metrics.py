@@ -0,0 +1,275 @@
+"""
+Métricas - GastX
+Contadores e histogramas no formato de exposição do Prometheus e
+cronometragem por etapa do processamento de uploads
+"""
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+# Limites (segundos) dos histogramas de duração
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Limites dos histogramas de tamanho (linhas e bytes)
+ROW_BUCKETS = (100, 1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+BYTE_BUCKETS = (10_000, 100_000, 1_000_000, 10_000_000, 50_000_000, 100_000_000, 500_000_000)
+
+# Rótulo de gastx_uploads_total para cada código de erro HTTP
+UPLOAD_FAILURE_STATUS = {400: "invalid", 429: "rejected", 500: "error"}
+
+# Padrões avaliados até decidir a categoria de um título
+PATTERN_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Escapa barras, aspas e quebras de linha no valor de um rótulo"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    """Renderiza {nome="valor",...} (vazio quando não há rótulos)"""
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    """Inteiros sem casas decimais, demais valores com repr do float"""
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Contador monotônico, opcionalmente com rótulos"""
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Incrementa o contador da combinação de rótulos"""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def snapshot(self) -> Dict[LabelValues, float]:
+        """Cópia dos valores (para enviar entre processos)"""
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, values: Dict[LabelValues, float]) -> None:
+        """Soma valores vindos de outro processo"""
+        with self._lock:
+            for labels, value in values.items():
+                self._values[labels] = self._values.get(labels, 0) + value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.snapshot().items())
+        ]
+
+
+class Histogram:
+    """Histograma com limites fixos, opcionalmente com rótulos"""
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        buckets: Sequence[float],
+        labelnames: Sequence[str] = ()
+    ):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        # Por combinação de rótulos: [contagens por faixa (+Inf no fim), soma]
+        self._series: Dict[LabelValues, List[Any]] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Registra uma observação"""
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][position] += 1
+            series[1] += value
+
+    def snapshot(self) -> Dict[LabelValues, List[Any]]:
+        with self._lock:
+            return {labels: [list(counts), total] for labels, (counts, total) in self._series.items()}
+
+    def merge(self, series: Dict[LabelValues, List[Any]]) -> None:
+        """Soma as séries de outro processo (mesmos limites)"""
+        with self._lock:
+            for labels, (counts, total) in series.items():
+                current = self._series.get(labels)
+                if current is None:
+                    self._series[labels] = [list(counts), total]
+                    continue
+                current[0] = [a + b for a, b in zip(current[0], counts)]
+                current[1] += total
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, (counts, total) in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """
+    Valor lido no momento da coleta (ex.: tamanho de um cache). Com
+    kind="counter", expõe contadores mantidos por outro componente.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        collect: Callable[[], Dict[LabelValues, float]],
+        labelnames: Sequence[str] = (),
+        kind: str = "gauge"
+    ):
+        self.kind = kind
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._collect = collect
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self._collect().items())
+        ]
+
+
+class Registry:
+    """Conjunto de métricas expostas em /metrics"""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Formato de exposição em texto do Prometheus (versão 0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class StageTimings:
+    """
+    Durações por etapa de um upload. Etapas repetidas (uma vez por bloco
+    do CSV) são somadas.
+    """
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = self.durations.get(name, 0.0) + time.perf_counter() - start
+
+    def server_timing(self) -> str:
+        """Valor do cabeçalho Server-Timing (durações em milissegundos)"""
+        return ", ".join(
+            f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.durations.items()
+        )
+
+
+# Instância compartilhada pela API
+registry = Registry()
+
+upload_stage_seconds = registry.register(Histogram(
+    "gastx_upload_stage_seconds",
+    "Duração de cada etapa do processamento de um upload",
+    DURATION_BUCKETS,
+    ("stage",)
+))
+upload_rows = registry.register(Histogram(
+    "gastx_upload_rows", "Transações por upload", ROW_BUCKETS
+))
+upload_bytes = registry.register(Histogram(
+    "gastx_upload_bytes", "Tamanho dos arquivos enviados", BYTE_BUCKETS
+))
+uploads_total = registry.register(Counter(
+    "gastx_uploads_total", "Uploads processados por resultado", ("status",)
+))
+categorizer_matches = registry.register(Counter(
+    "gastx_categorizer_matches_total",
+    "Títulos distintos categorizados, por prioridade do padrão (none = sem padrão)",
+    ("priority",)
+))
+categorizer_patterns_evaluated = registry.register(Histogram(
+    "gastx_categorizer_patterns_evaluated",
+    "Padrões avaliados por título até decidir a categoria",
+    PATTERN_BUCKETS
+))
+
+
+def record_upload(timings: StageTimings, rows: int, size: int, status: str = "success") -> None:
+    """Registra as durações e volumes de um upload concluído"""
+    for stage, seconds in timings.durations.items():
+        upload_stage_seconds.observe(seconds, stage)
+    upload_rows.observe(rows)
+    upload_bytes.observe(size)
+    uploads_total.inc(status)
+
+
+def categorizer_snapshot() -> Dict[str, Any]:
+    """Contadores do categorizador deste processo (enviados pelos workers)"""
+    return {
+        "matches": categorizer_matches.snapshot(),
+        "patterns_evaluated": categorizer_patterns_evaluated.snapshot()
+    }
+
+
+def merge_categorizer(snapshot: Dict[str, Any]) -> None:
+    """Incorpora os contadores recebidos de um processo do pool"""
+    categorizer_matches.merge(snapshot["matches"])
+    categorizer_patterns_evaluated.merge(snapshot["patterns_evaluated"])
+
+
+def reset_categorizer() -> None:
+    categorizer_matches.reset()
+    categorizer_patterns_evaluated.reset()
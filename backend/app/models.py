@@ -4,7 +4,7 @@ Versão 0.3.0
 """
 
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from enum import Enum
 
 
@@ -39,6 +39,12 @@ class CategorySuggestion(BaseModel):
     score: float
 
 
+class MerchantOverride(BaseModel):
+    """Categoria definida pelo usuário para um estabelecimento"""
+    merchant: str
+    category: str
+
+
 class TransactionResponse(BaseModel):
     """Resposta com lista de transações"""
     transactions: List[Transaction]
@@ -55,6 +61,33 @@ class UploadResponse(BaseModel):
     transactions: List[dict]
     category_summary: List[dict]
     categorization_rate: Optional[float] = None
+    monthly_data: Optional[List[dict]] = None
+    upload_id: Optional[str] = None
+
+
+class BatchUploadResponse(UploadResponse):
+    """Resposta do upload em lote: conjunto mesclado e detalhes por arquivo"""
+    files: List[dict]
+    duplicates_removed: int
+
+
+class AppendUploadResponse(UploadResponse):
+    """Resposta do append: agregações do upload inteiro e transações novas"""
+    new_transactions: int
+    duplicates_skipped: int
+
+
+class TransactionPageResponse(BaseModel):
+    """Página de transações filtradas de um upload armazenado"""
+    upload_id: str
+    page: int
+    limit: int
+    total: int
+    total_pages: int
+    total_spent: float
+    total_received: float
+    facets: Dict[str, int] = {}
+    transactions: List[dict]
 
 
 class CategoriesResponse(BaseModel):
@@ -0,0 +1,165 @@
+"""
+Correções por Estabelecimento - GastX
+Categoria escolhida pelo usuário para um estabelecimento, consultada antes
+dos padrões regex
+"""
+
+import hashlib
+import json
+from threading import Lock
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from app.categorizer import normalize_title
+from app.config import OVERRIDES_PATH
+from app.persistence import FileSignature, file_lock, file_signature, read_json, write_json_atomic
+
+DEFAULT_USER = "default"
+
+# Tabela de um usuário: título normalizado -> categoria
+OverrideTable = Dict[str, str]
+
+
+def merchant_key(merchant: str) -> str:
+    """
+    Chave de um estabelecimento: o título normalizado usado pelo cache do
+    categorizador, sem parcelas e finais de cartão.
+
+    Raises:
+        ValueError: Se o estabelecimento ficar vazio após a normalização
+    """
+    key = normalize_title(merchant or "")
+    if not key:
+        raise ValueError("Estabelecimento vazio")
+    return key
+
+
+def overrides_fingerprint(table: Optional[Mapping[str, str]]) -> str:
+    """Resumo de uma tabela de correções ("" quando vazia), para chaves de cache"""
+    if not table:
+        return ""
+    encoded = json.dumps(sorted(table.items()), ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class OverrideStore:
+    """
+    Correções de categoria por usuário, persistidas em um arquivo JSON
+    versionado ({"version": n, "users": {usuário: {estabelecimento: categoria}}}).
+
+    Cada tabela é um dicionário, então a consulta custa um acesso por hash.
+    As tabelas nunca são alteradas no lugar: cada escrita monta uma nova e
+    troca a referência, de modo que um upload em andamento usa do início ao
+    fim a tabela que recebeu. Assim como o RuleStore, as escritas passam
+    por trava de arquivo e os demais workers recarregam via refresh().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.version = 0
+        self._tables: Dict[str, OverrideTable] = {}
+        self._signature: Optional[FileSignature] = None
+        self._lock = Lock()
+
+    def _read(self) -> Tuple[int, Dict[str, OverrideTable]]:
+        data = read_json(self.path, {})
+        # Renormaliza as chaves: a normalização pode ter mudado desde a gravação
+        tables = {
+            user: {normalize_title(merchant): category for merchant, category in table.items()}
+            for user, table in data.get("users", {}).items()
+        }
+        return int(data.get("version", 0)), tables
+
+    def refresh(self) -> bool:
+        """Recarrega as tabelas se o arquivo mudou desde a última leitura"""
+        if file_signature(self.path) == self._signature:
+            return False
+        with self._lock:
+            signature = file_signature(self.path)
+            if signature == self._signature:
+                return False
+            self.version, self._tables = self._read()
+            self._signature = signature
+            return True
+
+    def for_user(self, user: str = DEFAULT_USER) -> Mapping[str, str]:
+        """Tabela atual do usuário (somente leitura)"""
+        return self._tables.get(user, {})
+
+    def _update(self, user: str, change: Callable[[OverrideTable], int]) -> int:
+        """
+        Aplica uma alteração à tabela do usuário e grava o arquivo.
+
+        Args:
+            user: Dono da tabela
+            change: Recebe uma cópia da tabela, altera-a e retorna quantas
+                entradas mudaram (0 dispensa a gravação)
+
+        Returns:
+            Número de entradas alteradas
+        """
+        with self._lock, file_lock(self.path):
+            version, tables = self._read()
+            table = dict(tables.get(user, {}))
+            changed = change(table)
+            if changed:
+                version += 1
+                if table:
+                    tables[user] = table
+                else:
+                    tables.pop(user, None)
+                write_json_atomic(self.path, {"version": version, "users": tables})
+            self.version, self._tables = version, tables
+            self._signature = file_signature(self.path)
+            return changed
+
+    def set(self, user: str, merchant: str, category: str) -> str:
+        """Define a categoria de um estabelecimento; retorna a chave normalizada"""
+        key = merchant_key(merchant)
+
+        def change(table: OverrideTable) -> int:
+            if table.get(key) == category:
+                return 0
+            table[key] = category
+            return 1
+
+        self._update(user, change)
+        return key
+
+    def delete(self, user: str, merchant: str) -> bool:
+        """Remove a correção de um estabelecimento; False se não existia"""
+        key = merchant_key(merchant)
+        return self._update(user, lambda table: 1 if table.pop(key, None) else 0) > 0
+
+    def import_overrides(self, user: str, items: List[Tuple[str, str]], replace: bool = False) -> int:
+        """
+        Grava várias correções de uma vez (uma única escrita do arquivo).
+
+        Args:
+            user: Dono da tabela
+            items: Pares (estabelecimento, categoria)
+            replace: Descarta as correções existentes antes de importar
+
+        Returns:
+            Número de entradas alteradas
+        """
+        entries = [(merchant_key(merchant), category) for merchant, category in items]
+
+        def change(table: OverrideTable) -> int:
+            before = dict(table)
+            if replace:
+                table.clear()
+            table.update(entries)
+            return sum(1 for key in before.keys() | table.keys() if before.get(key) != table.get(key))
+
+        return self._update(user, change)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "users": len(self._tables),
+            "overrides": sum(len(table) for table in self._tables.values())
+        }
+
+
+# Instância compartilhada pela API
+override_store = OverrideStore(OVERRIDES_PATH)
@@ -0,0 +1,223 @@
+"""
+Perfis de Leitura por Banco - GastX
+Separador, decimal e colunas definidos a partir do cabeçalho, antes do parser
+"""
+
+import csv
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.aggregation import parse_dates
+
+# Nomes de coluna (minúsculos, sem espaços nas pontas) de cada campo
+COLUMN_ALIASES: Dict[str, str] = {
+    # Datas
+    'date': 'date',
+    'data': 'date',
+    'data da transação': 'date',
+    'data transação': 'date',
+    'data lançamento': 'date',
+    # Descrições
+    'title': 'title',
+    'descrição': 'title',
+    'descriçao': 'title',
+    'descricao': 'title',
+    'histórico': 'title',
+    'historico': 'title',
+    'lançamento': 'title',
+    'lancamento': 'title',
+    'movimentação': 'title',
+    'movimentacao': 'title',
+    'detalhes': 'title',
+    # Valores
+    'amount': 'amount',
+    'valor': 'amount',
+    'value': 'amount',
+    'valor (r$)': 'amount',
+    'quantia': 'amount'
+}
+
+SEPARATORS = [',', ';', '\t', '|']
+
+# Linhas da amostra usadas para decidir o separador decimal
+DECIMAL_SAMPLE_ROWS = 200
+
+# Formatos de data reconhecidos na amostra, na ordem de verificação
+DATE_FORMATS = [
+    (re.compile(r'^\d{4}-\d{2}-\d{2}'), '%Y-%m-%d'),
+    (re.compile(r'^\d{2}/\d{2}/\d{4}'), '%d/%m/%Y'),
+    (re.compile(r'^\d{2}-\d{2}-\d{4}'), '%d-%m-%Y'),
+    (re.compile(r'^\d{2}\.\d{2}\.\d{4}'), '%d.%m.%Y')
+]
+
+_COMMA_DECIMAL = re.compile(r'\d,\d{1,2}$')
+_DOT_DECIMAL = re.compile(r'\d\.\d{1,2}$')
+
+
+@dataclass(frozen=True)
+class ParserProfile:
+    """Formato padrão do CSV exportado por um banco"""
+    bank: str
+    sep: str
+    decimal: str
+    thousands: Optional[str]
+    date_format: str
+
+
+PARSER_PROFILES: Dict[str, ParserProfile] = {
+    "Nubank": ParserProfile("Nubank", ",", ".", None, "%Y-%m-%d"),
+    "Inter": ParserProfile("Inter", ";", ",", ".", "%d/%m/%Y"),
+    "Bradesco": ParserProfile("Bradesco", ";", ",", ".", "%d/%m/%Y"),
+    "Itaú": ParserProfile("Itaú", ";", ",", ".", "%d/%m/%Y"),
+    "C6 Bank": ParserProfile("C6 Bank", ";", ",", ".", "%d/%m/%Y")
+}
+
+DEFAULT_PROFILE = ParserProfile("Desconhecido", ",", ".", None, "%Y-%m-%d")
+
+
+@dataclass
+class CsvLayout:
+    """Opções de leitura resolvidas para um arquivo específico"""
+    profile: ParserProfile
+    sep: str
+    decimal: str
+    thousands: Optional[str]
+    date_format: str
+    header: List[str]
+    columns: Dict[str, str]   # Nome no arquivo -> date/title/amount
+
+    def read_options(self) -> Dict[str, Any]:
+        """Argumentos de pd.read_csv: só as colunas usadas, sem inferência de texto"""
+        text_columns = [raw for raw, name in self.columns.items() if name != 'amount']
+        return {
+            "sep": self.sep,
+            "usecols": list(self.columns),
+            "dtype": {raw: str for raw in text_columns},
+            "decimal": self.decimal,
+            "thousands": self.thousands
+        }
+
+
+def _sniff_separator(header_line: str, default: str) -> str:
+    """Separador mais frequente na linha de cabeçalho"""
+    counts = {sep: header_line.count(sep) for sep in SEPARATORS}
+    best = max(counts, key=counts.get)
+    return best if counts[best] > 0 else default
+
+
+def _sniff_decimal(values: List[str], default: str) -> str:
+    """Decide o separador decimal pelos valores da amostra ("1.234,56" ou "1,234.56")"""
+    comma = sum(1 for v in values if _COMMA_DECIMAL.search(v))
+    dot = sum(1 for v in values if _DOT_DECIMAL.search(v))
+    if comma == dot:
+        return default
+    return ',' if comma > dot else '.'
+
+
+def _sniff_date_format(values: List[str], default: str) -> str:
+    """Formato de data predominante na amostra"""
+    counts = {fmt: 0 for _, fmt in DATE_FORMATS}
+    for value in values:
+        for pattern, fmt in DATE_FORMATS:
+            if pattern.match(value):
+                counts[fmt] += 1
+                break
+    best = max(counts, key=counts.get)
+    return best if counts[best] > 0 else default
+
+
+def sniff_layout(
+    sample: str,
+    detect_bank: Callable[[List[str]], str],
+    complete: bool = True
+) -> Optional[CsvLayout]:
+    """
+    Resolve separador, decimal e colunas a partir do início do arquivo.
+
+    Args:
+        sample: Início do arquivo já decodificado
+        detect_bank: Função que identifica o banco pelos nomes das colunas
+        complete: Se False, a última linha da amostra pode estar cortada
+
+    Returns:
+        CsvLayout, ou None se o cabeçalho não tiver data, título e valor
+    """
+    lines = sample.splitlines()
+    if not complete:
+        lines = lines[:-1]
+    lines = [line for line in lines if line.strip()]
+    if not lines:
+        return None
+
+    sep = _sniff_separator(lines[0], DEFAULT_PROFILE.sep)
+    rows = list(csv.reader(lines[:DECIMAL_SAMPLE_ROWS + 1], delimiter=sep))
+    header = rows[0]
+    profile = PARSER_PROFILES.get(detect_bank(header), DEFAULT_PROFILE)
+
+    columns: Dict[str, str] = {}
+    positions: Dict[str, int] = {}
+    for position, raw in enumerate(header):
+        name = COLUMN_ALIASES.get(raw.lower().strip())
+        if name and name not in positions:
+            columns[raw] = name
+            positions[name] = position
+    if len(positions) < 3:
+        return None
+
+    width = max(positions.values()) + 1
+    sample_rows = [row for row in rows[1:] if len(row) >= width]
+    amounts = [row[positions['amount']].strip() for row in sample_rows]
+    dates = [row[positions['date']].strip() for row in sample_rows]
+    date_format = _sniff_date_format(dates, profile.date_format)
+
+    decimal = _sniff_decimal(amounts, profile.decimal)
+    if decimal == ',':
+        thousands = '.'
+    else:
+        thousands = ',' if sep != ',' else None
+
+    return CsvLayout(
+        profile=profile,
+        sep=sep,
+        decimal=decimal,
+        thousands=thousands,
+        date_format=date_format,
+        header=header,
+        columns=columns
+    )
+
+
+def parse_amounts(values: pd.Series) -> pd.Series:
+    """
+    Converte valores em texto ("R$ 1.234,56", "-29.74", "1,234.56") para
+    float. O último separador de cada valor é tratado como decimal;
+    valores inválidos viram 0.
+    """
+    text = values.astype(str).str.replace(r'[R$\s]', '', regex=True)
+    comma = text.str.rfind(',').to_numpy()
+    dot = text.str.rfind('.').to_numpy()
+    comma_decimal = comma > dot
+
+    cleaned = np.where(
+        comma_decimal,
+        text.str.replace('.', '', regex=False).str.replace(',', '.', regex=False),
+        text.str.replace(',', '', regex=False)
+    )
+    return pd.to_numeric(pd.Series(cleaned, index=values.index), errors='coerce').fillna(0)
+
+
+def parse_date_column(values: pd.Series, date_format: str) -> pd.Series:
+    """
+    Converte a coluna de datas para datetime64 com o formato do arquivo,
+    sem inferência por linha. Valores fora do formato passam pela
+    conversão genérica (ISO ou DD/MM/AAAA); os demais viram NaT.
+    """
+    parsed = pd.to_datetime(values, format=date_format, errors='coerce')
+    missing = parsed.isna() & values.notna()
+    if missing.any():
+        parsed[missing] = parse_dates(values[missing].astype(str))
+    return parsed.dt.normalize()
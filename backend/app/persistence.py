@@ -0,0 +1,92 @@
+"""
+Persistência em JSON - GastX
+Leitura, escrita atômica e trava entre processos para arquivos de estado
+compartilhados pelos workers da API
+"""
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Identifica uma versão do arquivo: (inode, mtime em ns, tamanho)
+FileSignature = Tuple[int, int, int]
+
+
+def file_signature(path: str) -> Optional[FileSignature]:
+    """Assinatura do arquivo (None se não existir); muda a cada substituição"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def read_json(path: str, default: Any) -> Any:
+    """Conteúdo do arquivo JSON, ou o padrão se ele não existir"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def write_json_atomic(path: str, data: Any) -> None:
+    """Grava em arquivo temporário e substitui o original (atômico)"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".gastx-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """Trava exclusiva entre processos (arquivo path + ".lock")"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".lock", "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class RefreshMiddleware:
+    """
+    Middleware ASGI que chama refresh() dos armazenamentos antes de cada
+    requisição, aplicando o que outros processos gravaram
+    """
+
+    def __init__(self, app, stores: Sequence[Any] = ()):
+        self.app = app
+        self.stores = tuple(stores)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            for store in self.stores:
+                store.refresh()
+        await self.app(scope, receive, send)
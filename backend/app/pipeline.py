@@ -0,0 +1,257 @@
+"""
+Pipeline de Upload - GastX
+Etapa síncrona comum ao upload direto e aos jobs em segundo plano
+"""
+
+from typing import Any, BinaryIO, Callable, Dict, List, Mapping, Optional, Tuple
+
+import pandas as pd
+
+from app.aggregation import UploadAccumulator
+from app.categorizer import batch_categorize_series
+from app.dedup import fingerprint_hashes, merge_without_overlap
+from app.ingestion import (
+    IngestedUpload,
+    empty_transactions,
+    ingest_csv,
+    iter_csv_chunks,
+    transaction_columns
+)
+from app.metrics import StageTimings
+from app.serialization import columnar_transactions, transaction_records
+from app.store import StoredUpload, transaction_store
+from app.upload_cache import upload_cache, upload_key
+from app.workers import cpu_executor
+
+UPLOAD_FORMATS = ["json", "columnar"]
+
+
+def process_upload(
+    fileobj: BinaryIO,
+    include_transactions: bool = True,
+    store: bool = True,
+    format: str = "json",
+    on_chunk: Optional[Callable[[UploadAccumulator], None]] = None,
+    timings: Optional[StageTimings] = None,
+    overrides: Optional[Mapping[str, str]] = None,
+    cache_key: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Ingere, categoriza, agrega e (opcionalmente) armazena um CSV.
+    
+    Args:
+        fileobj: Arquivo binário posicionado no início
+        include_transactions: Inclui as transações na resposta
+        store: Mantém as transações no servidor (retorna upload_id)
+        format: json (lista de objetos) ou columnar (arrays paralelos)
+        on_chunk: Chamada após cada bloco com o acumulador parcial
+        timings: Acumula as durações de cada etapa
+        overrides: Correções de categoria do usuário por estabelecimento
+        cache_key: Chave de upload_key; reaproveita (e grava) o resultado
+            da ingestão no cache em disco
+        
+    Returns:
+        Dicionário com os campos de UploadResponse
+    """
+    timings = timings or StageTimings()
+    keep_transactions = include_transactions or store
+    
+    result = None
+    if cache_key is not None:
+        with timings.stage("cache"):
+            result = upload_cache.load(cache_key, keep_transactions)
+    
+    if result is None:
+        result = ingest_csv(
+            fileobj,
+            keep_transactions=keep_transactions,
+            categorize_uniques=cpu_executor.categorize_uniques,
+            on_chunk=on_chunk,
+            timings=timings,
+            overrides=overrides
+        )
+        if cache_key is not None:
+            with timings.stage("cache"):
+                upload_cache.save(cache_key, result)
+    
+    return build_payload(
+        result.bank, result.accumulator, result.transactions,
+        include_transactions, store, format, timings
+    )
+
+
+def ingest_file(fileobj: BinaryIO, overrides: Optional[Mapping[str, str]] = None) -> IngestedUpload:
+    """
+    Ingere um arquivo mantendo as transações (usado no upload em lote).
+    Extratos já enviados antes são lidos do cache em disco.
+    """
+    key = upload_key(fileobj, overrides)
+    result = upload_cache.load(key, need_transactions=True)
+    if result is None:
+        result = ingest_csv(
+            fileobj,
+            keep_transactions=True,
+            categorize_uniques=cpu_executor.categorize_uniques,
+            overrides=overrides
+        )
+        upload_cache.save(key, result)
+    return result
+
+
+def merge_uploads(
+    files: List[Tuple[str, IngestedUpload]],
+    include_transactions: bool = True,
+    store: bool = True,
+    format: str = "json"
+) -> Dict[str, Any]:
+    """
+    Junta vários arquivos já ingeridos em um único conjunto, descartando
+    transações repetidas entre extratos sobrepostos.
+    
+    Args:
+        files: Pares (nome do arquivo, resultado da ingestão)
+        include_transactions: Inclui as transações na resposta
+        store: Mantém o conjunto mesclado no servidor
+        format: json ou columnar
+        
+    Returns:
+        Dicionário com os campos de BatchUploadResponse
+    """
+    frames = [ingested.transactions for _, ingested in files]
+    merged, removed = merge_without_overlap(frames)
+    if merged.empty:
+        merged = empty_transactions()
+    
+    accumulator = UploadAccumulator()
+    accumulator.add(merged)
+    
+    banks = {ingested.bank for _, ingested in files}
+    bank = banks.pop() if len(banks) == 1 else "Múltiplos"
+    
+    payload = build_payload(bank, accumulator, merged, include_transactions, store, format)
+    payload["duplicates_removed"] = sum(removed)
+    payload["files"] = [
+        {
+            "filename": name,
+            "bank_detected": ingested.bank,
+            "transactions": len(ingested.transactions),
+            "duplicates_removed": duplicates
+        }
+        for (name, ingested), duplicates in zip(files, removed)
+    ]
+    return payload
+
+
+def append_upload(
+    fileobj: BinaryIO,
+    upload: StoredUpload,
+    include_transactions: bool = True,
+    format: str = "json",
+    timings: Optional[StageTimings] = None,
+    overrides: Optional[Mapping[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Acrescenta a um upload armazenado apenas as transações do arquivo que
+    ele ainda não tem (ex.: extrato do mês seguinte exportado com alguns
+    dias repetidos).
+    
+    As transações são identificadas por data, título normalizado, valor e
+    índice de ocorrência (ver dedup.fingerprint_frame). Só as novas são
+    categorizadas e somadas às agregações armazenadas, então o custo
+    acompanha o tamanho do arquivo e não o do histórico.
+    
+    Args:
+        fileobj: Arquivo binário posicionado no início
+        upload: Upload armazenado que recebe as transações
+        include_transactions: Inclui as transações novas na resposta
+        format: json ou columnar
+        timings: Acumula as durações de cada etapa
+        overrides: Correções de categoria do usuário por estabelecimento
+        
+    Returns:
+        Dicionário com os campos de AppendUploadResponse (agregações do
+        upload inteiro, transações apenas as novas)
+    """
+    timings = timings or StageTimings()
+    
+    # O banco é detectado uma vez por arquivo (todos os blocos trazem o
+    # mesmo); arquivo sem linhas mantém o banco armazenado
+    file_bank = upload.bank
+    frames = []
+    for file_bank, chunk in iter_csv_chunks(fileobj, timings=timings):
+        frames.append(transaction_columns(chunk))
+    incoming = pd.concat(frames, ignore_index=True) if frames else empty_transactions()
+    
+    with upload.lock:
+        with timings.stage("fingerprint"):
+            hashes = fingerprint_hashes(incoming)
+            new = ~upload.known_rows(hashes)
+        
+        delta = incoming[new].reset_index(drop=True)
+        with timings.stage("categorize"):
+            categorized = batch_categorize_series(
+                delta["title"], cpu_executor.categorize_uniques, overrides
+            )
+            delta["category"] = categorized["category"]
+            delta["confidence"] = categorized["confidence"]
+        
+        with timings.stage("aggregate"):
+            upload.append(delta, hashes[new], file_bank)
+        
+        payload = build_payload(
+            upload.bank, upload.summary(), delta,
+            include_transactions, False, format, timings
+        )
+    
+    payload["upload_id"] = upload.upload_id
+    payload["new_transactions"] = len(delta)
+    payload["duplicates_skipped"] = len(incoming) - len(delta)
+    return payload
+
+
+def build_payload(
+    bank: str,
+    accumulator: UploadAccumulator,
+    transactions: Optional[pd.DataFrame],
+    include_transactions: bool,
+    store: bool,
+    format: str,
+    timings: Optional[StageTimings] = None
+) -> Dict[str, Any]:
+    """Armazena (opcionalmente) as transações e monta a resposta do upload"""
+    timings = timings or StageTimings()
+    
+    upload_id = None
+    if store:
+        with timings.stage("store"):
+            upload_id = transaction_store.save(bank, transactions, accumulator).upload_id
+    
+    rows = [] if format == "json" else None
+    if include_transactions:
+        with timings.stage("serialize"):
+            if format == "columnar":
+                rows = columnar_transactions(transactions)
+            else:
+                rows = transaction_records(transactions)
+    
+    with timings.stage("stats"):
+        stats = accumulator.stats()
+        totals = accumulator.totals()
+        category_summary = accumulator.category_summary()
+        monthly_data = accumulator.monthly_data()
+    
+    payload = {
+        "success": True,
+        "bank_detected": bank,
+        "total_transactions": accumulator.total,
+        "total_spent": totals["total_spent"],
+        "total_received": totals["total_received"],
+        "transactions": rows,
+        "category_summary": category_summary,
+        "categorization_rate": stats.get("categorization_rate", 0),
+        "monthly_data": monthly_data,
+        "upload_id": upload_id
+    }
+    if format == "columnar":
+        payload["format"] = "columnar"
+    return payload
@@ -0,0 +1,131 @@
+"""
+Perfil de Padrões - GastX
+Avaliações, acertos e tempo de busca de cada regra de categorização
+"""
+
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence, Tuple
+
+from app.config import PATTERN_PROFILING
+
+if TYPE_CHECKING:
+    # O categorizador importa este módulo; RuleKey só é usado nas anotações
+    from app.categorizer import RuleKey
+
+PROFILE_SORT_FIELDS = ["seconds", "evaluations", "matches", "avg_us"]
+
+
+class PatternProfiler:
+    """
+    Acumula, por padrão, quantas vezes foi avaliado, quantas vezes casou
+    e o tempo total gasto em regex.search.
+
+    Desativado por padrão: o motor de casamento só mede quando enabled é
+    True. Os títulos servidos pelo cache de categorização não passam pelos
+    padrões e, portanto, não entram no perfil (limpe-o ao ligar o perfil).
+    O cache de uploads é ignorado enquanto o perfil está ligado.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.titles = 0
+        self._stats: Dict["RuleKey", List[float]] = {}
+        self._lock = Lock()
+
+    def set_enabled(self, enabled: bool) -> None:
+        self.enabled = enabled
+
+    def reset(self) -> None:
+        with self._lock:
+            self.titles = 0
+            self._stats.clear()
+
+    def record(self, samples: Sequence[Tuple["RuleKey", bool, float]]) -> None:
+        """Registra as avaliações de um título: (padrão, casou, segundos)"""
+        with self._lock:
+            self.titles += 1
+            stats = self._stats
+            for key, matched, seconds in samples:
+                entry = stats.get(key)
+                if entry is None:
+                    entry = stats[key] = [0, 0, 0.0]
+                entry[0] += 1
+                entry[1] += matched
+                entry[2] += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cópia dos contadores (para enviar entre processos)"""
+        with self._lock:
+            return {
+                "titles": self.titles,
+                "stats": {key: list(entry) for key, entry in self._stats.items()}
+            }
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        """Soma os contadores de outro processo"""
+        with self._lock:
+            self.titles += snapshot["titles"]
+            for key, (evaluations, matches, seconds) in snapshot["stats"].items():
+                entry = self._stats.setdefault(key, [0, 0, 0.0])
+                entry[0] += evaluations
+                entry[1] += matches
+                entry[2] += seconds
+
+    def report(
+        self,
+        patterns: Sequence["RuleKey"],
+        sort_by: str = "seconds",
+        limit: int = 50
+    ) -> Dict[str, Any]:
+        """
+        Monta o relatório do perfil para o conjunto de regras atual.
+
+        Args:
+            patterns: Padrões vigentes, na ordem de avaliação
+            sort_by: seconds, evaluations, matches ou avg_us (decrescente)
+            limit: Número de padrões na lista principal
+
+        Returns:
+            Totais, padrões ordenados pelo critério, padrões avaliados que
+            nunca casaram e padrões nunca avaliados
+        """
+        snapshot = self.snapshot()
+        stats = snapshot["stats"]
+
+        items = []
+        for order, key in enumerate(patterns):
+            evaluations, matches, seconds = stats.get(key, (0, 0, 0.0))
+            category, priority, pattern = key
+            items.append({
+                "order": order,
+                "category": category,
+                "priority": priority,
+                "pattern": pattern,
+                "evaluations": int(evaluations),
+                "matches": int(matches),
+                "hit_rate": round(matches / evaluations, 4) if evaluations else 0.0,
+                "seconds": round(seconds, 6),
+                "avg_us": round(seconds / evaluations * 1e6, 3) if evaluations else 0.0
+            })
+
+        never_matched = [
+            item for item in items if item["evaluations"] > 0 and item["matches"] == 0
+        ]
+        never_evaluated = [item for item in items if item["evaluations"] == 0]
+        never_matched.sort(key=lambda item: item["seconds"], reverse=True)
+
+        ranked = sorted(items, key=lambda item: item[sort_by], reverse=True)
+        return {
+            "enabled": self.enabled,
+            "titles_profiled": snapshot["titles"],
+            "patterns": len(items),
+            "total_evaluations": sum(item["evaluations"] for item in items),
+            "total_seconds": round(sum(item["seconds"] for item in items), 6),
+            "items": ranked[:limit],
+            "never_matched": never_matched,
+            "never_evaluated": never_evaluated
+        }
+
+
+# Instância compartilhada pela API
+pattern_profiler = PatternProfiler(enabled=PATTERN_PROFILING)
@@ -0,0 +1,196 @@
+"""
+Recategorização de Uploads - GastX
+Aplica padrões novos às transações já armazenadas, avaliando só as linhas
+que eles podem alterar
+"""
+
+import time
+from typing import Any, Dict, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.categorizer import (
+    PRIORITIES,
+    CompiledRule,
+    ConfidenceLevel,
+    categorize_unique_titles,
+    get_patterns,
+    get_rules_diff,
+    normalize_titles
+)
+from app.store import StoredUpload
+
+# Posição de cada nível de confiança na ordem de avaliação ("none" por último)
+_CONFIDENCE_RANK: Dict[str, int] = {priority: i for i, priority in enumerate(PRIORITIES)}
+
+
+def _candidate_mask(
+    rule: CompiledRule,
+    ranks: np.ndarray,
+    positions: np.ndarray,
+    order: Dict[str, int]
+) -> np.ndarray:
+    """
+    Linhas cujo resultado atual vem depois do padrão na ordem de avaliação
+    (prioridade -> categoria -> padrão): só nelas um padrão novo que casa
+    passa a ser o primeiro. As demais já casaram com um padrão anterior.
+
+    Args:
+        rule: Padrão acrescentado
+        ranks: Posição da confiança de cada linha (sem categoria = len(PRIORITIES))
+        positions: Posição da categoria de cada linha na ordem das categorias
+        order: Posição de cada categoria nos padrões vigentes
+    """
+    rank = _CONFIDENCE_RANK[rule.priority]
+    position = order[rule.category]
+    return (ranks > rank) | ((ranks == rank) & (positions > position))
+
+
+def recategorize_upload(
+    upload: StoredUpload,
+    overrides: Optional[Mapping[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Reaplica as regras vigentes a um upload armazenado.
+
+    Quando as regras só ganharam padrões desde a categorização do upload,
+    cada padrão novo é avaliado apenas nos títulos das linhas que ele pode
+    alterar: sem categoria ("Outros") ou com resultado posterior a ele na
+    ordem de avaliação (posições tiradas do índice de categorias). Os
+    títulos em que algum padrão novo casa passam pelo motor completo.
+    Remoções ou mudanças de ordem recategorizam todas as linhas. As linhas
+    que mudam são atualizadas no lugar e as agregações recebem só a
+    diferença (retira o antigo, soma o novo). Tudo ocorre com upload.lock,
+    que também protege as leituras (query, índice, agregados).
+
+    Args:
+        upload: Upload armazenado
+        overrides: Correções do usuário; linhas desses estabelecimentos
+            ficam com a categoria corrigida
+
+    Returns:
+        Relatório com modo, linhas avaliadas, linhas movidas e movimentos
+        por par (categoria anterior, nova categoria)
+    """
+    start = time.perf_counter()
+    overrides = overrides or {}
+
+    with upload.lock:
+        rule_keys, added = get_rules_diff(upload.rule_keys)
+        transactions = upload.transactions
+        size = len(transactions)
+
+        if added is None:
+            mode = "full"
+            candidates = np.ones(size, dtype=bool)
+        elif not added:
+            mode = "unchanged"
+            candidates = np.zeros(size, dtype=bool)
+        else:
+            mode = "incremental"
+            index = upload.index
+            order = {category: i for i, category in enumerate(get_patterns())}
+            code_positions = np.array(
+                [order.get(category, len(order)) for category in index.categories] + [len(order)]
+            )
+            positions = code_positions[index.category_codes]
+            ranks = transactions["confidence"].map(_CONFIDENCE_RANK).fillna(len(PRIORITIES)).to_numpy()
+            per_rule = [_candidate_mask(rule, ranks, positions, order) for rule in added]
+            candidates = np.logical_or.reduce(per_rule)
+
+        rows = np.flatnonzero(candidates)
+        codes, uniques = pd.factorize(transactions["title"].to_numpy()[rows])
+        keys = normalize_titles(uniques)
+
+        if mode == "incremental":
+            # Títulos em que algum padrão novo casa, entre as linhas que ele pode alterar
+            affected = np.zeros(len(rows), dtype=bool)
+            for rule, mask in zip(added, per_rule):
+                in_reach = mask[rows]
+                reach = np.unique(codes[in_reach])
+                hits = np.zeros(len(keys), dtype=bool)
+                hits[reach] = [rule.regex.search(key) is not None for key in keys[reach]]
+                affected |= in_reach & hits[codes]
+            rows, codes = rows[affected], codes[affected]
+
+        # Categoria e confiança novas de cada título distinto ainda envolvido
+        involved = np.unique(codes)
+        new_categories = np.empty(len(keys), dtype=object)
+        new_confidences = np.empty(len(keys), dtype=object)
+        pending = []
+        for code in involved.tolist():
+            forced = overrides.get(keys[code])
+            if forced is not None:
+                new_categories[code] = forced
+                new_confidences[code] = ConfidenceLevel.HIGH.value
+            else:
+                pending.append(code)
+        if pending:
+            categories, confidences = categorize_unique_titles(keys[pending].tolist())
+            new_categories[pending] = categories
+            new_confidences[pending] = confidences
+
+        category_column = transactions.columns.get_loc("category")
+        confidence_column = transactions.columns.get_loc("confidence")
+        old_categories = transactions["category"].to_numpy()[rows]
+        old_confidences = transactions["confidence"].to_numpy()[rows]
+        row_categories = new_categories[codes]
+        row_confidences = new_confidences[codes]
+        changed = (row_categories != old_categories) | (row_confidences != old_confidences)
+
+        moves: List[Dict[str, Any]] = []
+        moved = 0
+        if changed.any():
+            changed_rows = rows[changed]
+            before = transactions.iloc[changed_rows].copy()
+            transactions.iloc[changed_rows, category_column] = row_categories[changed]
+            transactions.iloc[changed_rows, confidence_column] = row_confidences[changed]
+
+            summary = upload.summary()
+            summary.remove(before)
+            summary.add(transactions.iloc[changed_rows])
+
+            pairs = pd.DataFrame({
+                "from": old_categories[changed],
+                "to": row_categories[changed]
+            })
+            pairs = pairs[pairs["from"] != pairs["to"]]
+            moved = len(pairs)
+            moves = [
+                {"from": source, "to": target, "rows": int(count)}
+                for (source, target), count in pairs.value_counts().items()
+            ]
+            upload.revision += 1
+            upload.invalidate()
+
+        upload.rule_keys = rule_keys
+
+    return {
+        "upload_id": upload.upload_id,
+        "mode": mode,
+        "patterns_added": len(added) if added else 0,
+        "rows_total": size,
+        "rows_evaluated": int(candidates.sum()),
+        "titles_evaluated": len(keys),
+        "rows_moved": moved,
+        "moves": moves,
+        "seconds": round(time.perf_counter() - start, 4)
+    }
+
+
+def recategorize_uploads(
+    uploads: List[StoredUpload],
+    overrides: Optional[Mapping[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Recategoriza vários uploads armazenados (ver recategorize_upload).
+
+    Returns:
+        Relatórios por upload e total de linhas movidas
+    """
+    reports = [recategorize_upload(upload, overrides) for upload in uploads]
+    return {
+        "uploads": reports,
+        "rows_moved": sum(report["rows_moved"] for report in reports)
+    }
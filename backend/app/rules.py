@@ -0,0 +1,125 @@
+"""
+Regras Persistentes - GastX
+Padrões adicionados pela API, gravados em disco e replicados entre processos
+"""
+
+import re
+from copy import deepcopy
+from datetime import datetime
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from app import categorizer
+from app.config import RULES_PATH
+from app.persistence import FileSignature, file_lock, file_signature, read_json, write_json_atomic
+
+
+class RuleStore:
+    """
+    Padrões adicionados em tempo de execução, persistidos em um arquivo JSON
+    versionado ({"version": n, "rules": [...]}).
+
+    Cada escrita relê o arquivo sob trava exclusiva, acrescenta o padrão,
+    incrementa a versão e substitui o arquivo de forma atômica. Os demais
+    processos da API chamam refresh() a cada requisição: um os.stat detecta
+    a alteração e as regras são recarregadas, de modo que todos os workers
+    categorizam com a mesma versão.
+    """
+
+    def __init__(self, path: str, base_patterns: Dict[str, Dict[str, List[str]]]):
+        self.path = path
+        self.version = 0
+        self.rules: List[Dict[str, str]] = []
+        self._base = deepcopy(base_patterns)
+        self._signature: Optional[FileSignature] = None
+        self._lock = Lock()
+
+    def _read(self) -> Tuple[int, List[Dict[str, str]]]:
+        data = read_json(self.path, {})
+        return int(data.get("version", 0)), list(data.get("rules", []))
+
+    def patterns(self, rules: Optional[List[Dict[str, str]]] = None) -> Dict[str, Dict[str, List[str]]]:
+        """Padrões embutidos acrescidos dos padrões persistidos"""
+        merged = deepcopy(self._base)
+        for rule in self.rules if rules is None else rules:
+            priorities = merged.get(rule["category"])
+            if priorities is None:
+                continue
+            current = priorities.setdefault(rule["priority"], [])
+            if rule["pattern"] not in current:
+                current.append(rule["pattern"])
+        return merged
+
+    def _apply(self, version: int, rules: List[Dict[str, str]]) -> None:
+        self.version = version
+        self.rules = rules
+        categorizer.load_rules(version, self.patterns(rules))
+
+    def refresh(self) -> bool:
+        """
+        Recarrega as regras se o arquivo mudou desde a última leitura.
+
+        Returns:
+            True se um novo conjunto de regras foi aplicado
+        """
+        if file_signature(self.path) == self._signature:
+            return False
+        with self._lock:
+            signature = file_signature(self.path)
+            if signature == self._signature:
+                return False
+            version, rules = self._read()
+            self._signature = signature
+            if version == self.version and rules == self.rules:
+                return False
+            self._apply(version, rules)
+            return True
+
+    def add_pattern(self, category: str, pattern: str, priority: str = "medium") -> bool:
+        """
+        Persiste um novo padrão e o aplica neste processo.
+
+        Args:
+            category: Nome da categoria (deve existir)
+            pattern: Padrão regex (convertido para minúsculas)
+            priority: Prioridade do padrão (high, medium, low)
+
+        Returns:
+            True se adicionado; False para categoria inexistente ou padrão repetido
+
+        Raises:
+            re.error: Se o padrão não for uma regex válida
+        """
+        if category not in self._base:
+            return False
+
+        pattern = pattern.lower()
+        re.compile(pattern)
+
+        with self._lock, file_lock(self.path):
+            # Parte do arquivo: outro processo pode ter gravado desde o último refresh
+            version, rules = self._read()
+            if pattern in self.patterns(rules)[category].get(priority, []):
+                if version != self.version:
+                    self._apply(version, rules)
+                self._signature = file_signature(self.path)
+                return False
+
+            rules = rules + [{
+                "category": category,
+                "priority": priority,
+                "pattern": pattern,
+                "added_at": datetime.now().isoformat(timespec="seconds")
+            }]
+            version += 1
+            write_json_atomic(self.path, {"version": version, "rules": rules})
+            self._signature = file_signature(self.path)
+            self._apply(version, rules)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {"version": self.version, "rules": len(self.rules), "path": self.path}
+
+
+# Instância compartilhada pela API
+rule_store = RuleStore(RULES_PATH, categorizer.CATEGORY_PATTERNS)
@@ -0,0 +1,87 @@
+"""
+Serialização Compacta - GastX
+Formato colunar para transações e resposta JSON rápida
+"""
+
+import json
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usa o json da biblioteca padrão
+    orjson = None
+
+
+def _dictionary_encode(values: pd.Series) -> Dict[str, Any]:
+    """Codifica uma coluna repetitiva como códigos inteiros + dicionário"""
+    codes, uniques = pd.factorize(values)
+    return {
+        "values": [str(v) for v in uniques],
+        "codes": codes.astype(np.int32)
+    }
+
+
+def format_dates(dates: pd.Series) -> np.ndarray:
+    """
+    Datas datetime64 como texto "YYYY-MM-DD" ("" para datas inválidas).
+    Formata só as datas distintas, que costumam ser poucas centenas.
+    """
+    codes, uniques = pd.factorize(dates)
+    labels = np.append(pd.DatetimeIndex(uniques).strftime("%Y-%m-%d").to_numpy(dtype=object), "")
+    return labels[codes]
+
+
+def transaction_records(transactions: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Transações como lista de objetos, com datas em texto ISO"""
+    records = transactions.assign(date=format_dates(transactions["date"]))
+    return records.to_dict(orient="records")
+
+
+def columnar_transactions(transactions: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Converte as transações em arrays paralelos.
+
+    Categorias e níveis de confiança são codificados por dicionário:
+    "codes" traz um inteiro por transação e "values" o texto de cada código.
+    """
+    return {
+        "date": format_dates(transactions["date"]).tolist(),
+        "title": transactions["title"].tolist(),
+        "amount": transactions["amount"].to_numpy(dtype=np.float64),
+        "category": _dictionary_encode(transactions["category"]),
+        "confidence": _dictionary_encode(transactions["confidence"])
+    }
+
+
+def _default(value: Any) -> Any:
+    """Conversão de tipos NumPy para o encoder padrão"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serializa para JSON compacto, usando orjson quando disponível"""
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class CompactJSONResponse(Response):
+    """Resposta JSON sem validação Pydantic, serializada por dumps()"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,255 @@
+"""
+Armazenamento de Uploads - GastX
+Tabela colunar em memória por upload, com consultas filtradas e paginadas
+"""
+
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from threading import RLock
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.aggregation import UploadAccumulator, aggregate_by_period, category_evolution
+from app.cache import LRUCache
+from app.categorizer import RuleKey, get_rule_keys
+from app.config import STORE_MAX_UPLOADS
+from app.dedup import fingerprint_hashes
+from app.index import TransactionIndex, bitmap_from_rows
+from app.serialization import transaction_records
+
+TRANSACTION_TYPES = ["all", "expenses", "income"]
+
+SORT_FIELDS = ["date", "title", "amount", "category"]
+
+
+@dataclass
+class TransactionFilter:
+    """Critérios de filtragem de transações (mesma semântica do frontend)"""
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    categories: List[str] = field(default_factory=list)
+    min_amount: Optional[float] = None   # Compara com o valor absoluto
+    max_amount: Optional[float] = None   # Compara com o valor absoluto
+    search: Optional[str] = None
+    transaction_type: str = "all"        # all, expenses, income
+
+
+@dataclass
+class StoredUpload:
+    """Upload processado mantido no servidor"""
+    upload_id: str
+    bank: str
+    created_at: datetime
+    transactions: pd.DataFrame
+    accumulator: Optional[UploadAccumulator] = field(default=None, repr=False)
+    revision: int = 0                    # Incrementada a cada append/recategorização
+    rule_keys: Tuple[RuleKey, ...] = field(default=(), repr=False)   # Padrões usados na categorização
+    # Serializa escritas (append, recategorização) e leituras das transações
+    lock: RLock = field(default_factory=RLock, repr=False)
+
+    _index: Optional[TransactionIndex] = field(default=None, repr=False)
+    _aggregates: Dict[Tuple[str, str], Any] = field(default_factory=dict, repr=False)
+    _fingerprints: Optional[Set[int]] = field(default=None, repr=False)
+
+    @property
+    def index(self) -> TransactionIndex:
+        """Índice colunar, construído na primeira consulta"""
+        with self.lock:
+            if self._index is None:
+                self._index = TransactionIndex(self.transactions)
+            return self._index
+
+    def invalidate(self) -> None:
+        """Descarta índice e agregados após alterações nas transações"""
+        self._index = None
+        self._aggregates.clear()
+
+    def summary(self) -> UploadAccumulator:
+        """Agregações do upload inteiro (categorias, meses, totais)"""
+        with self.lock:
+            if self.accumulator is None:
+                self.accumulator = UploadAccumulator()
+                self.accumulator.add(self.transactions)
+            return self.accumulator
+
+    def _fingerprint_set(self) -> Set[int]:
+        """Hashes das transações armazenadas, calculados no primeiro append"""
+        if self._fingerprints is None:
+            self._fingerprints = set(fingerprint_hashes(self.transactions).tolist())
+        return self._fingerprints
+
+    def known_rows(self, hashes: np.ndarray) -> np.ndarray:
+        """Máscara das transações (por hash de fingerprint_hashes) já armazenadas"""
+        known = self._fingerprint_set()
+        return np.fromiter((h in known for h in hashes.tolist()), dtype=bool, count=len(hashes))
+
+    def append(self, transactions: pd.DataFrame, hashes: np.ndarray, bank: str) -> None:
+        """
+        Acrescenta transações novas e atualiza as agregações com elas,
+        sem recalcular o histórico. Chamar com lock adquirido, junto com
+        known_rows, para que a checagem e a escrita sejam atômicas.
+
+        Args:
+            transactions: Transações categorizadas ainda não armazenadas
+            hashes: Identidade de cada transação (fingerprint_hashes)
+            bank: Banco do extrato de origem
+        """
+        summary = self.summary()
+        fingerprints = self._fingerprint_set()
+        if transactions.empty:
+            return
+        if bank != self.bank:
+            self.bank = "Múltiplos"
+        self.transactions = pd.concat([self.transactions, transactions], ignore_index=True)
+        summary.add(transactions)
+        fingerprints.update(hashes.tolist())
+        self.revision += 1
+        self.invalidate()
+
+    def period_totals(self, granularity: str = "month") -> List[Dict[str, Any]]:
+        """Gastos/recebimentos por período, calculados uma vez por granularidade"""
+        key = ("totals", granularity)
+        with self.lock:
+            if key not in self._aggregates:
+                self._aggregates[key] = aggregate_by_period(self.transactions, granularity)
+            return self._aggregates[key]
+
+    def category_evolution(self, granularity: str = "month") -> Dict[str, Any]:
+        """Gastos por categoria e período, calculados uma vez por granularidade"""
+        key = ("categories", granularity)
+        with self.lock:
+            if key not in self._aggregates:
+                self._aggregates[key] = category_evolution(self.transactions, granularity)
+            return self._aggregates[key]
+
+    def query(
+        self,
+        filters: TransactionFilter,
+        page: int = 1,
+        limit: int = 20,
+        sort_by: Optional[str] = None,
+        descending: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Retorna uma página das transações filtradas, os totais do filtro e
+        as contagens por categoria (facetas).
+
+        As facetas consideram todos os filtros exceto o de categorias, para
+        que a seleção de uma categoria não zere as demais.
+
+        Args:
+            filters: Critérios de filtragem
+            page: Página (começando em 1)
+            limit: Transações por página
+            sort_by: Campo de ordenação (None mantém a ordem do arquivo)
+            descending: Ordenação decrescente
+
+        Returns:
+            Dicionário com a página de transações, totais e facetas
+        """
+        # Escritas concorrentes trocam transações e índice; a consulta usa
+        # um estado consistente dos dois
+        with self.lock:
+            index = self.index
+            df = self.transactions
+
+            bitmap = index.all_bitmap.copy()
+            if filters.start_date or filters.end_date:
+                bitmap &= index.date_range(filters.start_date, filters.end_date)
+            if filters.min_amount is not None or filters.max_amount is not None:
+                bitmap &= index.amount_range(filters.min_amount, filters.max_amount)
+            if filters.transaction_type == "expenses":
+                bitmap &= index.expense_bitmap
+            elif filters.transaction_type == "income":
+                bitmap &= index.income_bitmap
+
+            if filters.search:
+                # Busca textual só nas linhas que já passaram pelos filtros indexados
+                candidates = index.rows(bitmap)
+                titles = df["title"].to_numpy()[candidates]
+                found = pd.Series(titles, dtype=object).str.lower().str.contains(
+                    filters.search.lower(), regex=False
+                ).to_numpy(dtype=bool)
+                bitmap = bitmap_from_rows(candidates[found], index.size)
+
+            facets = index.facet_counts(bitmap)
+            if filters.categories:
+                bitmap &= index.category_union(filters.categories)
+
+            if sort_by == "date":
+                rows = index.sorted_rows(bitmap, index.date_order)
+            elif sort_by == "amount":
+                rows = index.sorted_rows(bitmap, index.amount_order)
+            else:
+                rows = index.rows(bitmap)
+            if sort_by in ("date", "amount") and descending:
+                rows = rows[::-1]
+
+            filtered = df.iloc[rows]
+            if sort_by in ("title", "category"):
+                filtered = filtered.sort_values(
+                    sort_by, ascending=not descending, kind="stable"
+                )
+
+            total = len(filtered)
+            start = (page - 1) * limit
+            page_rows = filtered.iloc[start:start + limit]
+
+            amount = filtered["amount"]
+            return {
+                "upload_id": self.upload_id,
+                "page": page,
+                "limit": limit,
+                "total": total,
+                "total_pages": (total + limit - 1) // limit,
+                "total_spent": round(float(amount[amount > 0].sum()), 2),
+                "total_received": round(abs(float(amount[amount < 0].sum())), 2),
+                "facets": facets,
+                "transactions": transaction_records(page_rows)
+            }
+
+
+class TransactionStore:
+    """Uploads mantidos em memória, com descarte dos menos usados"""
+
+    def __init__(self, max_uploads: int = STORE_MAX_UPLOADS):
+        self._uploads = LRUCache(max_uploads)
+
+    def save(
+        self,
+        bank: str,
+        transactions: pd.DataFrame,
+        accumulator: Optional[UploadAccumulator] = None
+    ) -> StoredUpload:
+        """
+        Armazena as transações de um upload e retorna o registro.
+        O acumulador, se informado, passa a ser do upload (appends o alteram).
+        """
+        upload = StoredUpload(
+            upload_id=uuid.uuid4().hex,
+            bank=bank,
+            created_at=datetime.now(),
+            transactions=transactions.reset_index(drop=True),
+            accumulator=accumulator,
+            rule_keys=get_rule_keys()
+        )
+        self._uploads.put(upload.upload_id, upload)
+        return upload
+
+    def get(self, upload_id: str) -> Optional[StoredUpload]:
+        """Retorna um upload armazenado, se ainda existir"""
+        return self._uploads.get(upload_id)
+
+    def uploads(self) -> List[StoredUpload]:
+        """Uploads armazenados no momento"""
+        return self._uploads.values()
+
+    def __len__(self) -> int:
+        return len(self._uploads)
+
+
+# Instância compartilhada pela API
+transaction_store = TransactionStore()
@@ -0,0 +1,214 @@
+"""
+Cache de Uploads - GastX
+Resultados de uploads indexados pelo hash do conteúdo do arquivo
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, Mapping, Optional
+
+from app.cache import SizedLRUCache
+from app.categorizer import get_rules_fingerprint
+from app.config import UPLOAD_CACHE_BYTES, UPLOAD_CACHE_DIR, UPLOAD_CACHE_DISK_BYTES
+from app.ingestion import IngestedUpload
+from app.metrics import Counter, registry
+from app.overrides import overrides_fingerprint
+from app.profiling import pattern_profiler
+
+# Incrementar quando a ingestão passar a produzir resultados diferentes
+# para o mesmo arquivo (parsing, normalização), invalidando o disco
+CACHE_FORMAT = 1
+
+# Tamanho dos blocos lidos para calcular o hash do arquivo
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """Resposta de upload já serializada"""
+    body: bytes
+    rows: int
+
+
+def content_digest(fileobj: BinaryIO) -> str:
+    """SHA-256 do conteúdo do arquivo (a posição volta ao início)"""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    while True:
+        block = fileobj.read(HASH_BLOCK_SIZE)
+        if not block:
+            break
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def upload_key(fileobj: BinaryIO, overrides: Optional[Mapping[str, str]] = None) -> str:
+    """
+    Chave de cache de um upload: conteúdo do arquivo, regras vigentes e
+    correções do usuário. Alterar padrões ou correções gera outra chave, de
+    modo que resultados antigos deixam de ser encontrados.
+    """
+    parts = [
+        str(CACHE_FORMAT),
+        content_digest(fileobj),
+        get_rules_fingerprint(),
+        overrides_fingerprint(overrides)
+    ]
+    return hashlib.sha256(":".join(parts).encode("ascii")).hexdigest()
+
+
+class UploadResultCache:
+    """
+    Cache em duas camadas para uploads repetidos.
+
+    Em memória ficam as respostas já serializadas de uploads sem
+    armazenamento, por chave e opções (formato, inclusão das transações),
+    limitadas pelo total de bytes: um reenvio idêntico não repete nem a
+    serialização. Uploads armazenados não passam por essa camada, pois
+    cada um precisa de um upload_id próprio. Com o perfil de padrões
+    ligado, as duas camadas são ignoradas na leitura, para que todo upload
+    passe pelos padrões e entre no perfil.
+    Em disco fica o resultado da ingestão (banco, agregações e transações),
+    que serve a qualquer combinação de opções, sobrevive a reinícios e é
+    compartilhado pelos workers; os arquivos menos usados recentemente são
+    removidos quando o diretório passa do limite.
+    """
+
+    def __init__(self, max_bytes: int, directory: str, max_disk_bytes: int):
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._responses = SizedLRUCache(max_bytes, sizeof=lambda cached: len(cached.body))
+        self.requests = Counter(
+            "gastx_upload_cache_requests_total",
+            "Consultas ao cache de uploads por camada e resultado",
+            ("tier", "result")
+        )
+
+    def configure(self, max_bytes: int, max_disk_bytes: int) -> None:
+        """Altera os limites das camadas (0 desativa)"""
+        self._responses.resize(max_bytes)
+        self.max_disk_bytes = max_disk_bytes
+
+    def get_response(self, key: Any) -> Optional[CachedResponse]:
+        """Resposta serializada de um upload sem armazenamento"""
+        if pattern_profiler.enabled:
+            self.requests.inc("memory", "bypass")
+            return None
+        cached = self._responses.get(key)
+        self.requests.inc("memory", "hit" if cached is not None else "miss")
+        return cached
+
+    def put_response(self, key: Any, cached: CachedResponse) -> None:
+        self._responses.put(key, cached)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def load(self, key: str, need_transactions: bool) -> Optional[IngestedUpload]:
+        """
+        Resultado da ingestão gravado em disco para a chave.
+
+        Args:
+            key: Chave de upload_key
+            need_transactions: Exige as transações (uploads com
+                include_transactions=False e store=False gravam só agregações)
+
+        Returns:
+            IngestedUpload ou None se ausente, incompleto ou ilegível
+        """
+        if self.max_disk_bytes <= 0:
+            return None
+        if pattern_profiler.enabled:
+            self.requests.inc("disk", "bypass")
+            return None
+        path = self._path(key)
+        try:
+            # Arquivos gravados pelo próprio backend, em diretório da aplicação
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            result = None
+        except Exception:
+            result = None
+            self._remove(path)
+        if result is not None and need_transactions and result.transactions is None:
+            result = None
+        self.requests.inc("disk", "hit" if result is not None else "miss")
+        return result
+
+    def save(self, key: str, result: IngestedUpload) -> None:
+        """Grava o resultado da ingestão (atômico) e aplica o limite do diretório"""
+        if self.max_disk_bytes <= 0:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".upload-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            self._remove(temp_path)
+            raise
+        self._trim_disk()
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _disk_entries(self):
+        """(mtime, tamanho, caminho) dos resultados gravados"""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if not name.endswith(".pkl"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _trim_disk(self) -> None:
+        """Remove os resultados menos usados até caber no limite"""
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self) -> None:
+        """Descarta as duas camadas"""
+        self._responses.clear()
+        for _, _, path in self._disk_entries():
+            self._remove(path)
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._disk_entries()
+        return {
+            "memory": self._responses.stats(),
+            "disk": {
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_disk_bytes
+            }
+        }
+
+
+# Instância compartilhada pela API
+upload_cache = UploadResultCache(UPLOAD_CACHE_BYTES, UPLOAD_CACHE_DIR, UPLOAD_CACHE_DISK_BYTES)
+registry.register(upload_cache.requests)
@@ -0,0 +1,152 @@
+"""
+Execução de Trabalho CPU - GastX
+Pool de processos para categorização e limite de uploads simultâneos
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from threading import Lock
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app import categorizer, metrics
+from app.profiling import pattern_profiler
+from app.config import (
+    CPU_WORKERS,
+    MAX_CONCURRENT_UPLOADS,
+    MAX_QUEUED_UPLOADS,
+    PARALLEL_MIN_TITLES_PER_WORKER
+)
+
+
+class QueueFullError(RuntimeError):
+    """Fila de processamento cheia; o cliente deve tentar novamente"""
+
+
+def _categorize_in_worker(
+    version: int,
+    patterns: Dict[str, Dict[str, List[str]]],
+    titles: List[str],
+    profiling: bool = False
+) -> Tuple[List[str], List[str], Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Executado no processo filho: sincroniza as regras e categoriza.
+    Retorna também os contadores do categorizador e, no modo de perfil,
+    o perfil de padrões desta chamada.
+    """
+    categorizer.load_rules(version, patterns)
+    metrics.reset_categorizer()
+    pattern_profiler.set_enabled(profiling)
+    pattern_profiler.reset()
+    categories, confidences = categorizer.categorize_unique_titles(titles)
+    profile = pattern_profiler.snapshot() if profiling else None
+    return categories, confidences, metrics.categorizer_snapshot(), profile
+
+
+class CPUExecutor:
+    """
+    Distribui a categorização de títulos distintos entre processos.
+
+    O pool é criado sob demanda. Lotes com menos de min_titles_per_worker
+    títulos por processo rodam no próprio processo, onde o custo de
+    serialização não compensa.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = CPU_WORKERS,
+        min_titles_per_worker: int = PARALLEL_MIN_TITLES_PER_WORKER
+    ):
+        self.max_workers = max_workers
+        self.min_titles_per_worker = min_titles_per_worker
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def categorize_uniques(self, titles: Sequence) -> Tuple[List[str], List[str]]:
+        """Categoriza títulos distintos, em paralelo quando o lote é grande"""
+        if self.max_workers <= 1 or len(titles) < self.max_workers * self.min_titles_per_worker:
+            return categorizer.categorize_unique_titles(titles)
+
+        version, patterns = categorizer.get_rules_snapshot()
+        size = -(-len(titles) // self.max_workers)
+        parts = [list(titles[i:i + size]) for i in range(0, len(titles), size)]
+
+        pool = self._get_pool()
+        futures = [
+            pool.submit(_categorize_in_worker, version, patterns, part, pattern_profiler.enabled)
+            for part in parts
+        ]
+
+        categories: List[str] = []
+        confidences: List[str] = []
+        for future in futures:
+            part_categories, part_confidences, counters, profile = future.result()
+            metrics.merge_categorizer(counters)
+            if profile is not None:
+                pattern_profiler.merge(profile)
+            categories.extend(part_categories)
+            confidences.extend(part_confidences)
+        return categories, confidences
+
+    def shutdown(self) -> None:
+        """Encerra o pool de processos, se criado"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+class UploadLimiter:
+    """
+    Limita uploads processados ao mesmo tempo.
+
+    Até max_concurrent uploads rodam em paralelo e até max_queued aguardam;
+    além disso, slot() levanta QueueFullError (respondido como HTTP 429).
+    """
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_UPLOADS, max_queued: int = MAX_QUEUED_UPLOADS):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max(0, max_queued)
+        self.active = 0
+        self.waiting = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def is_full(self) -> bool:
+        """Indica se um novo upload seria recusado"""
+        return self.active + self.waiting >= self.max_concurrent + self.max_queued
+
+    @asynccontextmanager
+    async def slot(self):
+        """Reserva uma vaga de processamento durante o bloco"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        if self.is_full():
+            raise QueueFullError("Servidor ocupado processando outros arquivos")
+
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+
+# Instâncias compartilhadas pela API
+cpu_executor = CPUExecutor()
+upload_limiter = UploadLimiter()
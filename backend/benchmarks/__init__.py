@@ -0,0 +1,4 @@
+"""
+Benchmarks - GastX
+Gerador de extratos sintéticos e medição dos caminhos críticos do backend
+"""
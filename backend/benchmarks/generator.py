@@ -0,0 +1,152 @@
+"""
+Gerador de Extratos Sintéticos - GastX
+CSVs no formato de cada banco, com mistura realista de estabelecimentos
+
+Uso:
+    python -m benchmarks.generator --bank inter --rows 100000 -o extrato.csv
+"""
+
+import argparse
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class BankFormat:
+    """Layout do CSV exportado por um banco"""
+    columns: Tuple[str, str, str]   # data, descrição, valor
+    sep: str
+    date_format: str
+    decimal: str
+    encoding: str = "utf-8"
+
+
+BANK_FORMATS = {
+    "nubank": BankFormat(("date", "title", "amount"), ",", "%Y-%m-%d", "."),
+    "inter": BankFormat(("Data", "Descrição", "Valor"), ";", "%d/%m/%Y", ",", "latin-1"),
+    "bradesco": BankFormat(("Data", "Histórico", "Valor"), ";", "%d/%m/%Y", ","),
+    "itau": BankFormat(("data", "lançamento", "valor"), ";", "%d/%m/%Y", ","),
+    "c6": BankFormat(("Data", "Movimentação", "Valor"), ";", "%d/%m/%Y", ",")
+}
+
+# (estabelecimento, peso, valor típico); valores negativos são recebimentos
+MERCHANTS: List[Tuple[str, float, float]] = [
+    ("Uber *Trip", 8.0, 25.0),
+    ("99 Pop", 3.0, 18.0),
+    ("Posto Shell", 3.0, 180.0),
+    ("Estapar Estacionamento", 1.0, 20.0),
+    ("iFood *Restaurante", 9.0, 55.0),
+    ("Padaria Pao Quente", 4.0, 18.0),
+    ("Supermercado Extra", 5.0, 240.0),
+    ("McDonalds", 2.0, 40.0),
+    ("Drogasil", 3.0, 60.0),
+    ("Droga Raia", 2.0, 55.0),
+    ("Unimed", 0.5, 450.0),
+    ("Netflix.com", 1.0, 39.9),
+    ("Spotify", 1.0, 21.9),
+    ("Cinemark", 1.0, 60.0),
+    ("Smart Fit", 1.0, 99.9),
+    ("Amazon Marketplace", 4.0, 130.0),
+    ("Mercado Livre", 4.0, 150.0),
+    ("Magazine Luiza", 1.0, 400.0),
+    ("Shopee", 3.0, 70.0),
+    ("Enel Energia", 0.5, 210.0),
+    ("Sabesp", 0.5, 90.0),
+    ("Vivo Fibra", 0.5, 120.0),
+    ("Pagamento Aluguel", 0.3, 1800.0),
+    ("Kalunga", 1.0, 80.0),
+    ("Loja do Bairro", 3.0, 45.0),
+    ("XPTO LTDA", 2.0, 120.0),
+    ("Transferência recebida", 4.0, -600.0),
+    ("Pix recebido", 3.0, -150.0),
+    ("Salário", 0.5, -5200.0)
+]
+
+# Fração das linhas com sufixo variável (código de loja, parcela, final do cartão)
+SUFFIX_RATE = 0.4
+
+
+def generate_transactions(rows: int, seed: int = 42, start: str = "2024-01-01") -> pd.DataFrame:
+    """
+    Gera transações sintéticas (data, título, valor) ao longo de um ano.
+
+    Args:
+        rows: Número de transações
+        seed: Semente do gerador aleatório (mesma semente, mesmo extrato)
+        start: Data inicial
+
+    Returns:
+        DataFrame com colunas 'date' (datetime64), 'title' e 'amount'
+    """
+    rng = np.random.default_rng(seed)
+    names = np.array([m[0] for m in MERCHANTS], dtype=object)
+    weights = np.array([m[1] for m in MERCHANTS])
+    typical = np.array([m[2] for m in MERCHANTS])
+
+    choice = rng.choice(len(MERCHANTS), size=rows, p=weights / weights.sum())
+    amounts = np.round(typical[choice] * rng.lognormal(0.0, 0.4, size=rows), 2)
+
+    titles = names[choice]
+    suffixed = rng.random(rows) < SUFFIX_RATE
+    kinds = rng.integers(0, 3, size=rows)
+    numbers = rng.integers(1, 10_000, size=rows)
+    installments = rng.integers(1, 12, size=rows)
+    for row in np.flatnonzero(suffixed):
+        if kinds[row] == 0:
+            titles[row] = f"{titles[row]} {numbers[row]:04d}"
+        elif kinds[row] == 1:
+            titles[row] = f"{titles[row]} {installments[row]}/12"
+        else:
+            titles[row] = f"{titles[row]} final {numbers[row]:04d}"
+
+    dates = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, 365, size=rows), unit="D")
+    return pd.DataFrame({"date": dates, "title": titles, "amount": amounts})
+
+
+def to_bank_csv(transactions: pd.DataFrame, bank: str = "nubank") -> bytes:
+    """
+    Serializa as transações no formato de exportação de um banco.
+
+    Args:
+        transactions: DataFrame de generate_transactions
+        bank: Chave de BANK_FORMATS
+
+    Returns:
+        Conteúdo do CSV já codificado
+    """
+    fmt = BANK_FORMATS[bank]
+    amounts = transactions["amount"].map("{:.2f}".format)
+    if fmt.decimal == ",":
+        amounts = amounts.str.replace(".", ",", regex=False)
+
+    frame = pd.DataFrame({
+        fmt.columns[0]: transactions["date"].dt.strftime(fmt.date_format),
+        fmt.columns[1]: transactions["title"],
+        fmt.columns[2]: amounts
+    })
+    text = frame.to_csv(index=False, sep=fmt.sep)
+    return text.encode(fmt.encoding, errors="replace")
+
+
+def generate_csv(rows: int, bank: str = "nubank", seed: int = 42) -> bytes:
+    """Atalho: gera e serializa um extrato sintético"""
+    return to_bank_csv(generate_transactions(rows, seed), bank)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Gera um extrato CSV sintético")
+    parser.add_argument("--bank", choices=sorted(BANK_FORMATS), default="nubank")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", required=True, help="Arquivo de saída")
+    args = parser.parse_args(argv)
+
+    with open(args.output, "wb") as f:
+        f.write(generate_csv(args.rows, args.bank, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Relatório de Perfil dos Padrões - GastX
+Categoriza um extrato (sintético ou real) medindo cada regra
+
+Uso (a partir de backend/):
+    python -m benchmarks.profile_patterns --rows 100000
+    python -m benchmarks.profile_patterns --csv extrato.csv --sort evaluations
+"""
+
+import argparse
+import json
+from typing import List, Optional
+
+from app import categorizer
+from app.ingestion import iter_csv_chunks
+from app.profiling import PROFILE_SORT_FIELDS, pattern_profiler
+from benchmarks.generator import generate_transactions
+
+
+def _load_titles(path: Optional[str], rows: int) -> List[str]:
+    """Títulos de um CSV real ou de um extrato sintético"""
+    if path is None:
+        return generate_transactions(rows)["title"].tolist()
+    titles: List[str] = []
+    with open(path, "rb") as f:
+        for _, chunk in iter_csv_chunks(f):
+            titles.extend(chunk["title"].fillna("").astype(str))
+    return titles
+
+
+def _print_table(title: str, items: List[dict]) -> None:
+    print(f"\n{title}")
+    print(f"{'categoria':<26} {'prior.':<7} {'avaliações':>11} {'acertos':>9} {'total ms':>10} {'µs/aval.':>9}  padrão")
+    for item in items:
+        print(
+            f"{item['category']:<26} {item['priority']:<7} {item['evaluations']:>11} "
+            f"{item['matches']:>9} {item['seconds'] * 1000:>10.2f} {item['avg_us']:>9.2f}  {item['pattern']}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Perfil das regras de categorização")
+    parser.add_argument("--csv", help="Extrato CSV a categorizar (padrão: sintético)")
+    parser.add_argument("--rows", type=int, default=100_000, help="Linhas do extrato sintético")
+    parser.add_argument("--sort", choices=PROFILE_SORT_FIELDS, default="seconds")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--json", help="Salva o relatório completo neste arquivo")
+    args = parser.parse_args(argv)
+
+    titles = _load_titles(args.csv, args.rows)
+
+    categorizer.clear_categorization_cache()
+    pattern_profiler.reset()
+    pattern_profiler.set_enabled(True)
+    try:
+        categorizer.categorize_unique_titles(titles)
+    finally:
+        pattern_profiler.set_enabled(False)
+
+    report = categorizer.get_pattern_profile(args.sort, args.limit)
+    print(
+        f"{len(titles)} títulos, {report['titles_profiled']} avaliados pelos padrões, "
+        f"{report['total_evaluations']} buscas em {report['total_seconds'] * 1000:.1f} ms"
+    )
+    _print_table(f"Top {args.limit} por {args.sort}", report["items"])
+    _print_table("Avaliados e nunca casaram", report["never_matched"][:args.limit])
+    print(f"\n{len(report['never_evaluated'])} padrões nunca avaliados (nenhum título passou pelo pré-filtro)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
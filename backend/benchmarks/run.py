@@ -0,0 +1,313 @@
+"""
+Suíte de Benchmarks - GastX
+Mede linhas/s e pico de memória dos caminhos críticos e salva em JSON
+
+Uso (a partir de backend/):
+    python -m benchmarks.run --rows 1000 100000
+    python -m benchmarks.run --rows 100000 --compare benchmarks/results/base.json
+"""
+
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from app import categorizer
+from app.categorizer import (
+    batch_categorize,
+    batch_categorize_series,
+    categorize_transaction_detailed,
+    suggest_categories,
+    suggest_category
+)
+from app.config import CPU_WORKERS, UPLOAD_CACHE_BYTES
+from app.ingestion import iter_csv_chunks
+from app.upload_cache import upload_cache
+from app.workers import CPUExecutor
+from benchmarks.generator import BANK_FORMATS, generate_transactions, to_bank_csv
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# suggest_category avalia todas as regras por título; limita a amostra
+SUGGEST_MAX_ROWS = 20_000
+
+
+def _clear_categorizer_caches() -> None:
+    """Mede o categorizador sem resultados memoizados de execuções anteriores"""
+    categorizer._invalidate_caches()
+
+
+def _measure(fn: Callable[[], Any], repeat: int) -> float:
+    """Menor tempo (s) entre as repetições"""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_memory_mb(fn: Callable[[], Any]) -> float:
+    """
+    Pico de memória alocada (MB) pelo Python durante uma execução.
+    Não inclui os processos do pool de categorização.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / (1024 * 1024), 2)
+
+
+def _upload_client():
+    """TestClient da API (importado só quando o benchmark de upload roda)"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    return TestClient(app)
+
+
+def build_cases(rows: int, bank: str) -> Dict[str, Tuple[Callable[[], Any], int, bool]]:
+    """
+    Monta os casos medidos para um tamanho de extrato.
+
+    Args:
+        rows: Número de transações do extrato sintético
+        bank: Formato do CSV (chave de BANK_FORMATS)
+
+    Returns:
+        Dicionário nome -> (função sem argumentos, linhas processadas,
+        se precisa de uma execução de aquecimento antes da medição)
+    """
+    transactions = generate_transactions(rows)
+    titles = transactions["title"].tolist()
+    title_series = pd.Series(titles)
+    suggest_titles = titles[:SUGGEST_MAX_ROWS]
+    data = to_bank_csv(transactions, bank)
+
+    def categorize_cold():
+        _clear_categorizer_caches()
+        for title in titles:
+            categorize_transaction_detailed(title)
+
+    def categorize_warm():
+        for title in titles:
+            categorize_transaction_detailed(title)
+
+    def batch_cold():
+        _clear_categorizer_caches()
+        batch_categorize(titles)
+
+    def batch_series_cold():
+        # Caminho dos uploads: fatoração, normalização e nova fatoração
+        _clear_categorizer_caches()
+        batch_categorize_series(title_series)
+
+    def suggest_cold():
+        _clear_categorizer_caches()
+        for title in suggest_titles:
+            suggest_category(title)
+
+    def suggest_bulk_cold():
+        _clear_categorizer_caches()
+        suggest_categories(suggest_titles)
+
+    # Títulos distintos a cada execução, para que os caches dos processos
+    # do pool (que persistem entre chamadas) não sejam aproveitados
+    runs = 0
+    serial_executor = CPUExecutor(max_workers=1)
+    pool_executor = CPUExecutor(max_workers=max(2, CPU_WORKERS), min_titles_per_worker=0)
+
+    def distinct_titles() -> List[str]:
+        nonlocal runs
+        runs += 1
+        return [f"{title} lote{runs}x{i}" for i, title in enumerate(titles)]
+
+    def uniques_serial():
+        _clear_categorizer_caches()
+        serial_executor.categorize_uniques(distinct_titles())
+
+    def uniques_pool():
+        pool_executor.categorize_uniques(distinct_titles())
+
+    def csv_parse():
+        for _, chunk in iter_csv_chunks(io.BytesIO(data)):
+            pass
+
+    client = None
+
+    def post_upload():
+        nonlocal client
+        if client is None:
+            client = _upload_client()
+        response = client.post(
+            "/upload/csv",
+            params={"store": "false"},
+            files={"file": ("extrato.csv", data, "text/csv")}
+        )
+        response.raise_for_status()
+
+    def upload():
+        # Sem cache de uploads: mede o processamento completo
+        upload_cache.configure(0, 0)
+        _clear_categorizer_caches()
+        post_upload()
+
+    def upload_repeat():
+        # Reenvio do mesmo arquivo (só a camada em memória, sem gravar em disco)
+        upload_cache.configure(UPLOAD_CACHE_BYTES, 0)
+        post_upload()
+
+    return {
+        "categorize_transaction_detailed.cold": (categorize_cold, rows, False),
+        "categorize_transaction_detailed.warm": (categorize_warm, rows, True),
+        "batch_categorize.cold": (batch_cold, rows, False),
+        "batch_categorize_series.cold": (batch_series_cold, rows, False),
+        "suggest_category.cold": (suggest_cold, len(suggest_titles), False),
+        "suggest_categories.cold": (suggest_bulk_cold, len(suggest_titles), False),
+        "categorize_uniques.serial": (uniques_serial, rows, False),
+        # Aquecimento cria o pool de processos fora da medição
+        "categorize_uniques.pool": (uniques_pool, rows, True),
+        "csv_parse": (csv_parse, rows, False),
+        # Aquecimento cria o cliente e o pool de processos fora da medição
+        "upload_csv": (upload, rows, True),
+        "upload_csv.repeat": (upload_repeat, rows, True)
+    }
+
+
+def run(
+    sizes: List[int],
+    bank: str = "nubank",
+    repeat: int = 3,
+    only: Optional[List[str]] = None,
+    memory: bool = True
+) -> Dict[str, Any]:
+    """
+    Executa a suíte e retorna o relatório.
+
+    Args:
+        sizes: Tamanhos de extrato (linhas)
+        bank: Formato do CSV gerado
+        repeat: Repetições por caso (vale a menor)
+        only: Prefixos dos casos a executar (None executa todos)
+        memory: Mede também o pico de memória (uma execução extra por caso)
+
+    Returns:
+        Relatório com ambiente e resultados por caso e tamanho
+    """
+    results = []
+    for rows in sizes:
+        for name, (fn, processed, warmup) in build_cases(rows, bank).items():
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            if warmup:
+                fn()
+            seconds = _measure(fn, repeat)
+            result = {
+                "name": name,
+                "rows": processed,
+                "seconds": round(seconds, 4),
+                "rows_per_second": round(processed / seconds, 1) if seconds > 0 else None
+            }
+            if memory:
+                result["peak_memory_mb"] = _peak_memory_mb(fn)
+            results.append(result)
+            print(
+                f"{name:<40} {processed:>9} linhas  {seconds:>8.3f}s  "
+                f"{result['rows_per_second'] or 0:>12,.0f} linhas/s",
+                flush=True
+            )
+
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "bank": bank,
+        "repeat": repeat,
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "results": results
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Compara linhas/s com uma execução anterior.
+
+    Args:
+        report: Relatório atual
+        baseline: Relatório de referência
+        threshold: Queda relativa tolerada (0.1 = 10%)
+
+    Returns:
+        Descrição dos casos que regrediram além do limite
+    """
+    if baseline.get("bank") != report["bank"]:
+        print(f"Aviso: referência gerada com formato {baseline.get('bank')}, atual {report['bank']}")
+    previous = {(r["name"], r["rows"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in report["results"]:
+        old = previous.get((result["name"], result["rows"]))
+        if not old or not old.get("rows_per_second") or not result["rows_per_second"]:
+            continue
+        change = result["rows_per_second"] / old["rows_per_second"] - 1
+        line = f"{result['name']} ({result['rows']} linhas): {change:+.1%}"
+        print(line)
+        if change < -threshold:
+            regressions.append(line)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks do backend GastX")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000],
+                        help="Tamanhos de extrato (1k a 1M linhas)")
+    parser.add_argument("--bank", choices=sorted(BANK_FORMATS), default="nubank")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="*", help="Prefixos dos casos a executar")
+    parser.add_argument("--no-memory", action="store_true", help="Não mede pico de memória")
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: benchmarks/results/)")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparação")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Queda de linhas/s tolerada na comparação (padrão: 0.10)")
+    args = parser.parse_args(argv)
+
+    report = run(args.rows, args.bank, args.repeat, args.only, not args.no_memory)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Resultados salvos em {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print("Regressões acima do limite:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
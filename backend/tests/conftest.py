@@ -0,0 +1,27 @@
+"""
+Configuração dos Testes - GastX
+Isola os dados da aplicação em um diretório temporário e restaura as regras
+de categorização alteradas pelos testes
+"""
+
+import os
+import tempfile
+
+# Antes de importar app.config: regras, correções e cache em disco ficam
+# fora do diretório de dados real; categorização no próprio processo
+os.environ["GASTX_DATA_DIR"] = tempfile.mkdtemp(prefix="gastx-tests-")
+os.environ.setdefault("GASTX_UPLOAD_CACHE_DISK_BYTES", "0")
+os.environ.setdefault("GASTX_CPU_WORKERS", "1")
+
+import pytest
+
+from app import categorizer
+
+
+@pytest.fixture
+def restore_rules():
+    """Devolve as regras e os caches de categorização ao estado anterior ao teste"""
+    _, patterns = categorizer.get_rules_snapshot()
+    yield
+    categorizer.load_rules(categorizer.get_rules_snapshot()[0] + 1, patterns)
+    categorizer.clear_categorization_cache()
@@ -0,0 +1,59 @@
+"""
+Testes das Agregações - GastX
+UploadAccumulator incremental contra o cálculo a partir do zero
+"""
+
+import pandas as pd
+
+from app.aggregation import UploadAccumulator
+from app.ingestion import categorize_chunk
+from benchmarks.generator import generate_transactions
+
+
+def categorized(rows: int, seed: int) -> pd.DataFrame:
+    return categorize_chunk(generate_transactions(rows, seed=seed))
+
+
+def accumulate(*chunks: pd.DataFrame) -> UploadAccumulator:
+    accumulator = UploadAccumulator()
+    for chunk in chunks:
+        accumulator.add(chunk)
+    return accumulator
+
+
+def assert_same_aggregates(a: UploadAccumulator, b: UploadAccumulator) -> None:
+    assert a.stats() == b.stats()
+    assert a.category_summary() == b.category_summary()
+    assert a.monthly_data() == b.monthly_data()
+    assert a.totals() == b.totals()
+
+
+def test_chunks_add_up_to_single_pass():
+    transactions = categorized(3000, seed=1)
+    chunks = [transactions.iloc[i:i + 700] for i in range(0, len(transactions), 700)]
+
+    assert_same_aggregates(accumulate(*chunks), accumulate(transactions))
+
+
+def test_remove_undoes_add():
+    transactions = categorized(3000, seed=2)
+    removed = transactions.sample(900, random_state=2)
+    kept = transactions.drop(removed.index)
+
+    accumulator = accumulate(transactions)
+    accumulator.remove(removed)
+
+    assert_same_aggregates(accumulator, accumulate(kept))
+
+
+def test_remove_drops_emptied_categories():
+    transactions = categorized(1000, seed=3)
+    category = transactions["category"].iloc[0]
+
+    accumulator = accumulate(transactions)
+    accumulator.remove(transactions[transactions["category"] == category])
+
+    assert category not in accumulator.stats()["by_category"]
+    assert category not in [item["category"] for item in accumulator.category_summary()]
+    for month in accumulator.monthly_data():
+        assert category not in month["categorias"]
@@ -0,0 +1,122 @@
+"""
+Testes do Motor de Categorização - GastX
+O motor com pré-filtro deve dar o mesmo resultado da varredura sequencial
+prioridade -> categoria -> padrão
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+
+from app.categorizer import (
+    PRIORITIES,
+    PRIORITY_CONFIDENCE,
+    PatternMatcher,
+    add_pattern,
+    categorize_transaction_detailed,
+    clear_categorization_cache,
+    fold_accents,
+    get_patterns,
+    normalize_title
+)
+from benchmarks.generator import generate_transactions
+
+
+def sequential_scan(
+    patterns: Dict[str, Dict[str, List[str]]],
+    text: str
+) -> List[Tuple[str, str, str]]:
+    """Todos os padrões que casam, na ordem da varredura original"""
+    return [
+        (category, priority, pattern)
+        for priority in PRIORITIES
+        for category, priorities in patterns.items()
+        for pattern in priorities.get(priority, [])
+        if re.search(fold_accents(pattern), text, re.IGNORECASE)
+    ]
+
+
+def first_match(patterns: Dict[str, Dict[str, List[str]]], text: str) -> Optional[Tuple[str, str]]:
+    matches = sequential_scan(patterns, text)
+    return matches[0][:2] if matches else None
+
+
+def sample_titles() -> List[str]:
+    """
+    Títulos do gerador de extratos e textos montados com as palavras de
+    cada padrão (sozinhas e combinadas com as de outro padrão), para que
+    todos os padrões casem e disputem a prioridade
+    """
+    words = [
+        " ".join(re.findall(r"[^\W_]+", pattern))
+        for priorities in get_patterns().values()
+        for items in priorities.values()
+        for pattern in items
+    ]
+    words = [w for w in words if w]
+    titles = set(generate_transactions(2000)["title"])
+    titles.update(f"Compra {w} 3/10" for w in words)
+    titles.update(f"{a} {b}" for a, b in zip(words, words[7:] + words[:7]))
+    titles.update(["FARMÁCIA São João", "Uber *Trip final 1234", "XPTO LTDA", "  "])
+    return sorted(titles)
+
+
+TITLES = sample_titles()
+
+
+def test_matcher_returns_first_pattern_of_sequential_scan():
+    patterns = get_patterns()
+    matcher = PatternMatcher(patterns)
+    for title in TITLES:
+        key = normalize_title(title)
+        rule = matcher.match(key)
+        found = (rule.category, rule.priority) if rule is not None else None
+        assert found == first_match(patterns, key), title
+
+
+def test_matcher_prefilter_keeps_every_match():
+    patterns = get_patterns()
+    matcher = PatternMatcher(patterns)
+    for title in TITLES:
+        key = normalize_title(title)
+        found = [(rule.category, rule.priority, rule.regex.pattern) for rule in matcher.match_all(key)]
+        expected = [(c, p, fold_accents(pattern)) for c, p, pattern in sequential_scan(patterns, key)]
+        assert found == expected, title
+
+
+def test_categorize_detailed_follows_pattern_order():
+    clear_categorization_cache()
+    patterns = get_patterns()
+    for title in TITLES:
+        result = categorize_transaction_detailed(title)
+        expected = first_match(patterns, normalize_title(title)) if title.strip() else None
+        if expected is None:
+            assert (result.category, result.confidence.value) == ("Outros", "none"), title
+        else:
+            category, priority = expected
+            assert result.category == category, title
+            assert result.confidence == PRIORITY_CONFIDENCE[priority], title
+
+
+@pytest.mark.parametrize("category, pattern, priority", [
+    ("Compras", "kalunga", "medium"),
+    ("Alimentação", "xpto", "low"),
+    ("Entretenimento", r"uber\s+\*trip", "high"),
+    # Sem literal obrigatório: avaliado em todo título, fora do índice
+    ("Compras", r"^(?:netflix|spotify)\b", "high"),
+])
+def test_added_pattern_invalidates_cached_results(restore_rules, category, pattern, priority):
+    # Memoiza os resultados com as regras atuais antes do acréscimo
+    for title in TITLES:
+        categorize_transaction_detailed(title)
+
+    assert add_pattern(category, pattern, priority)
+
+    patterns = get_patterns()
+    assert pattern in patterns[category][priority]
+    for title in TITLES:
+        expected = first_match(patterns, normalize_title(title)) if title.strip() else None
+        assert categorize_transaction_detailed(title).category == (
+            expected[0] if expected else "Outros"
+        ), title
@@ -0,0 +1,73 @@
+"""
+Testes da Deduplicação - GastX
+Identidade das transações entre extratos sobrepostos (lote e append)
+"""
+
+import io
+
+import pandas as pd
+
+from app.dedup import fingerprint_hashes, merge_without_overlap
+from app.ingestion import ingest_csv
+from app.pipeline import append_upload
+from app.store import transaction_store
+from benchmarks.generator import generate_transactions, to_bank_csv
+
+
+def frame(rows):
+    return pd.DataFrame({
+        "date": pd.to_datetime([date for date, _, _ in rows]),
+        "title": [title for _, title, _ in rows],
+        "amount": [amount for _, _, amount in rows]
+    })
+
+
+def test_fingerprint_ignores_title_noise_and_counts_occurrences():
+    hashes = fingerprint_hashes(frame([
+        ("2024-03-01", "Padaria Pão Quente 3/10", 12.5),
+        ("2024-03-01", "PADARIA PAO QUENTE", 12.5),
+        ("2024-03-01", "Padaria Pão Quente", 12.5),
+        ("2024-03-01", "Padaria Pão Quente", 12.51),
+    ]))
+
+    # Mesma transação repetida no dia: a segunda ocorrência é outra identidade
+    assert hashes[0] != hashes[1]
+    assert len(set(hashes[:3])) == 3
+    assert hashes[3] not in set(hashes[:3])
+    again = fingerprint_hashes(frame([("2024-03-01", "padaria pao quente", 12.5)]))
+    assert again[0] == hashes[0]
+
+
+def test_merge_keeps_max_occurrences_per_file():
+    coffee = ("2024-03-01", "Café", 6.0)
+    first = frame([coffee, coffee, ("2024-03-02", "Uber", 20.0)])
+    second = frame([coffee, coffee, coffee, ("2024-03-03", "Drogasil", 40.0)])
+
+    merged, removed = merge_without_overlap([first, second])
+
+    assert removed == [0, 2]
+    assert (merged["title"] == "Café").sum() == 3
+    assert len(merged) == 5
+
+
+def test_append_adds_only_unseen_transactions():
+    transactions = generate_transactions(4000, seed=5)
+    first, second = transactions.iloc[:2500], transactions.iloc[1500:]
+    result = ingest_csv(io.BytesIO(to_bank_csv(first)))
+    upload = transaction_store.save(result.bank, result.transactions, result.accumulator)
+
+    payload = append_upload(io.BytesIO(to_bank_csv(second)), upload, include_transactions=False)
+
+    expected = ingest_csv(io.BytesIO(to_bank_csv(transactions)))
+    assert payload["duplicates_skipped"] == 1000
+    assert payload["new_transactions"] == 1500
+    assert len(upload.transactions) == len(transactions)
+    assert sorted(fingerprint_hashes(upload.transactions)) == sorted(
+        fingerprint_hashes(expected.transactions)
+    )
+    assert upload.summary().stats() == expected.accumulator.stats()
+    assert upload.summary().category_summary() == expected.accumulator.category_summary()
+
+    # Reenviar o mesmo arquivo não acrescenta nada
+    payload = append_upload(io.BytesIO(to_bank_csv(second)), upload, include_transactions=False)
+    assert payload["new_transactions"] == 0
@@ -0,0 +1,76 @@
+"""
+Testes da Ingestão de CSV - GastX
+Encoding, detecção do layout de cada banco e erros de formato
+"""
+
+import io
+
+import pandas as pd
+import pytest
+
+from app.ingestion import ENCODING_SAMPLE_SIZE, IngestionError, detect_encoding, ingest_csv
+from benchmarks.generator import BANK_FORMATS, generate_transactions, to_bank_csv
+
+BANK_NAMES = {
+    "nubank": "Nubank",
+    "inter": "Inter",
+    "bradesco": "Bradesco",
+    "itau": "Itaú",
+    "c6": "C6 Bank"
+}
+
+
+def test_latin1_accent_only_in_middle_of_file():
+    rows = b"2024-01-01,Uber Trip,10.50\n" * 3000
+    middle = "2024-01-02,Farmácia Pague Menos,2.00\n".encode("latin-1")
+    data = b"date,title,amount\n" + rows + middle + rows
+    # O acento fica fora das amostras usadas na detecção do encoding
+    assert len(rows) > ENCODING_SAMPLE_SIZE
+    assert detect_encoding(data[:ENCODING_SAMPLE_SIZE], data[-ENCODING_SAMPLE_SIZE:]) == "utf-8"
+
+    transactions = ingest_csv(io.BytesIO(data)).transactions
+
+    assert len(transactions) == 6001
+    assert transactions.loc[3000, "title"] == "Farmácia Pague Menos"
+    assert not transactions["title"].str.contains("�").any()
+
+
+def test_utf8_accents_are_kept_next_to_invalid_bytes():
+    rows = b"2024-01-01,Uber Trip,10.50\n" * 3000
+    data = (
+        "date,title,amount\n2024-01-01,Café São Jorge,5.00\n".encode("utf-8")
+        + rows
+        + "2024-01-02,Padaria Pão Doce,2.00\n".encode("cp1252")
+        + rows
+    )
+
+    titles = ingest_csv(io.BytesIO(data)).transactions["title"]
+
+    assert titles.iloc[0] == "Café São Jorge"
+    assert titles.iloc[3001] == "Padaria Pão Doce"
+
+
+@pytest.mark.parametrize("bank", sorted(BANK_FORMATS))
+def test_bank_layouts_round_trip(bank):
+    expected = generate_transactions(500, seed=3)
+
+    result = ingest_csv(io.BytesIO(to_bank_csv(expected, bank)))
+    transactions = result.transactions
+
+    assert result.bank == BANK_NAMES[bank]
+    assert transactions["title"].tolist() == expected["title"].tolist()
+    assert transactions["amount"].tolist() == pytest.approx(expected["amount"].tolist())
+    pd.testing.assert_series_equal(
+        transactions["date"], expected["date"], check_names=False, check_dtype=False
+    )
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x01\x00",
+    b"\xff\xfe" + "date,title,amount\n".encode("utf-16-le") + b"\x00\xd8\x41\x00",
+    b"data,valor\n2024-01-01,10\n"
+])
+def test_invalid_files_raise_ingestion_error(data):
+    with pytest.raises(IngestionError):
+        ingest_csv(io.BytesIO(data))
@@ -0,0 +1,91 @@
+"""
+Testes da Recategorização - GastX
+Recategorizar um upload armazenado deve dar o mesmo resultado de enviar o
+extrato de novo com as regras vigentes
+"""
+
+import io
+
+import pandas as pd
+import pytest
+
+from app import categorizer
+from app.ingestion import ingest_csv
+from app.recategorize import recategorize_upload
+from app.store import transaction_store
+from benchmarks.generator import generate_transactions, to_bank_csv
+
+# Títulos que os padrões acrescentados nos testes passam a categorizar
+EXTRA_TITLES = [
+    "Kalunga Papelaria 3/10",
+    "KALÚNGA",
+    "Netflix Kalunga",
+    "XPTO LTDA final 1234",
+    "Padaria do Zé"
+]
+
+OVERRIDES = {"padaria do ze": "Compras"}
+
+
+@pytest.fixture
+def statement() -> bytes:
+    transactions = generate_transactions(3000, seed=7)
+    extra = transactions.sample(len(EXTRA_TITLES) * 40, random_state=7).copy()
+    extra["title"] = (EXTRA_TITLES * 40)[:len(extra)]
+    return to_bank_csv(pd.concat([transactions, extra], ignore_index=True))
+
+
+def store(data: bytes):
+    result = ingest_csv(io.BytesIO(data), overrides=OVERRIDES)
+    return transaction_store.save(result.bank, result.transactions, result.accumulator)
+
+
+def assert_same_as_fresh_upload(upload, data: bytes) -> None:
+    fresh = ingest_csv(io.BytesIO(data), overrides=OVERRIDES)
+    columns = ["date", "title", "amount", "category", "confidence"]
+    pd.testing.assert_frame_equal(
+        upload.transactions[columns].reset_index(drop=True),
+        fresh.transactions[columns].reset_index(drop=True)
+    )
+
+    summary = upload.summary()
+    assert summary.stats() == fresh.accumulator.stats()
+    assert summary.category_summary() == fresh.accumulator.category_summary()
+    assert summary.monthly_data() == fresh.accumulator.monthly_data()
+
+
+def test_added_patterns_recategorize_incrementally(restore_rules, statement):
+    upload = store(statement)
+    revision = upload.revision
+
+    categorizer.add_pattern("Compras", "kalunga", "medium")
+    categorizer.add_pattern("Alimentação", "xpto", "low")
+    # Mesma prioridade de "netflix" (Entretenimento): vale só a categoria anterior
+    categorizer.add_pattern("Compras", r"netflix\s+kalunga", "high")
+    categorizer.add_pattern("Assinaturas", "netflix", "high")
+
+    report = recategorize_upload(upload, OVERRIDES)
+
+    assert report["mode"] == "incremental"
+    assert report["patterns_added"] == 4
+    assert 0 < report["rows_evaluated"] < report["rows_total"]
+    assert report["rows_moved"] > 0
+    assert upload.revision == revision + 1
+    assert_same_as_fresh_upload(upload, statement)
+
+    # Regras já aplicadas: nada a fazer
+    assert recategorize_upload(upload, OVERRIDES)["mode"] == "unchanged"
+
+
+def test_reordered_rules_recategorize_every_row(restore_rules, statement):
+    upload = store(statement)
+
+    # Inverte a ordem das categorias: resultados anteriores deixam de valer
+    version, patterns = categorizer.get_rules_snapshot()
+    categorizer.load_rules(version + 1, dict(reversed(list(patterns.items()))))
+
+    report = recategorize_upload(upload, OVERRIDES)
+
+    assert report["mode"] == "full"
+    assert report["rows_evaluated"] == report["rows_total"]
+    assert_same_as_fresh_upload(upload, statement)
@@ -3,15 +3,37 @@ import { useDropzone } from 'react-dropzone'
 import { Upload, FileText, AlertCircle, CheckCircle2, Loader2 } from 'lucide-react'
 import axios from 'axios'
 
+const API_URL = 'http://localhost:8000'
+const POLL_INTERVAL_MS = 500
+
+const wait = (ms) => new Promise(resolve => setTimeout(resolve, ms))
+
+// Acompanha o job de upload até terminar e retorna o resultado
+async function waitForJob(job, onProgress) {
+  while (true) {
+    const { data } = await axios.get(`${API_URL}${job.status_url}`)
+    onProgress(data)
+
+    if (data.status === 'done' || data.status === 'failed') {
+      // Para jobs com falha, a rota de resultado responde com o erro
+      const result = await axios.get(`${API_URL}${job.result_url}`)
+      return result.data
+    }
+    await wait(POLL_INTERVAL_MS)
+  }
+}
+
 function UploadArea({ onUploadSuccess, isLoading, setIsLoading }) {
   const [error, setError] = useState(null)
   const [uploadedFile, setUploadedFile] = useState(null)
+  const [progress, setProgress] = useState(null)
 
   const onDrop = useCallback(async (acceptedFiles) => {
     const file = acceptedFiles[0]
     if (!file) return
 
     setError(null)
+    setProgress(null)
     setUploadedFile(file)
     setIsLoading(true)
 
@@ -19,14 +41,16 @@ function UploadArea({ onUploadSuccess, isLoading, setIsLoading }) {
     formData.append('file', file)
 
     try {
-      const response = await axios.post('http://localhost:8000/upload/csv', formData, {
+      const response = await axios.post(`${API_URL}/uploads`, formData, {
         headers: {
           'Content-Type': 'multipart/form-data'
         }
       })
 
-      if (response.data.success) {
-        onUploadSuccess(response.data)
+      const result = await waitForJob(response.data, setProgress)
+
+      if (result.success) {
+        onUploadSuccess(result)
       } else {
         setError('Erro ao processar o arquivo')
       }
@@ -36,9 +60,14 @@ function UploadArea({ onUploadSuccess, isLoading, setIsLoading }) {
       setUploadedFile(null)
     } finally {
       setIsLoading(false)
+      setProgress(null)
     }
   }, [onUploadSuccess, setIsLoading])
 
+  const progressPercent = progress && progress.bytes_total > 0
+    ? Math.round((progress.bytes_processed / progress.bytes_total) * 100)
+    : 0
+
   const { getRootProps, getInputProps, isDragActive } = useDropzone({
     onDrop,
     accept: {
@@ -81,8 +110,23 @@ function UploadArea({ onUploadSuccess, isLoading, setIsLoading }) {
             <Loader2 className="w-12 h-12 text-green-500 animate-spin" />
             <div>
               <p className="text-lg font-medium text-slate-700">Processando...</p>
-              <p className="text-sm text-slate-500">Analisando suas transações</p>
+              <p className="text-sm text-slate-500">
+                {progress && progress.rows_processed > 0
+                  ? `${progress.rows_processed.toLocaleString('pt-BR')} transações analisadas`
+                  : 'Analisando suas transações'}
+              </p>
             </div>
+            {progress && (
+              <div className="w-full max-w-xs">
+                <div className="h-2 bg-slate-200 rounded-full overflow-hidden">
+                  <div
+                    className="h-full bg-green-500 transition-all duration-300"
+                    style={{ width: `${progressPercent}%` }}
+                  />
+                </div>
+                <p className="text-xs text-slate-500 mt-1">{progressPercent}%</p>
+              </div>
+            )}
           </div>
         ) : uploadedFile && !error ? (
           <div className="flex flex-col items-center gap-4">